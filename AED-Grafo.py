@@ -1,9 +1,22 @@
-import pygame
-import math
-import random 
-import json
+import argparse
 import os
-from collections import deque
+import time
+import warnings
+import pygame
+from collections import OrderedDict
+from functools import lru_cache
+
+from nucleo_grafo import (
+    LARGURA, ALTURA, DIFICULDADES,
+    ESTADO_MENU, ESTADO_JOGANDO, ESTADO_INPUT_NOME, ESTADO_RANKING, ESTADO_DERROTA,
+    VISITADO, NA_FILA, INFINITO, NucleoJogo, ReservaFases, semente_diaria,
+)
+from banco_fases import abrir_banco, ler_semente
+from fontes import FontePreguicosa, ResolvedorFontes
+from perfil import Perfilador
+from recordes import ARQUIVO_RECORDES, ARQUIVO_RECORDES_LEGADO, ArmazemRecordes
+from replay import EXTENSAO_REPLAY, Replay
+from servidor_placar import PORTA_PADRAO, ClientePlacar
 
 C_BG_DARK     = (20, 23, 30) 
 C_BG_GRID     = (35, 40, 50)
@@ -24,261 +37,281 @@ C_BTN_NORMAL  = (50, 60, 80)
 C_BTN_HOVER   = (70, 80, 100)
 C_BTN_ACTIVE  = (0, 180, 130)
 
-LARGURA, ALTURA = 1000, 700
-ARQUIVO_RECORDES = "recordes_graph_arcade.json"
+# As fontes só são criadas quando o front end interativo sobe (ver main) e cada uma só abre o
+# arquivo no primeiro texto desenhado com ela; o caminho vem do cache de fontes.py.
+fonte_ui = fonte_bold = fonte_titulo = fonte_mini = None
+
+def carregar_fontes():
+    global fonte_ui, fonte_bold, fonte_titulo, fonte_mini
+    resolvedor = ResolvedorFontes()
+    fonte_ui = FontePreguicosa(resolvedor, 18)
+    fonte_bold = FontePreguicosa(resolvedor, 22, negrito=True)
+    fonte_titulo = FontePreguicosa(resolvedor, 50, negrito=True)
+    fonte_mini = FontePreguicosa(resolvedor, 14)
+
+# Textos estáticos e repetidos (títulos, botões, HUD) são rasterizados uma vez e reaproveitados.
+@lru_cache(maxsize=512)
+def render_texto(fonte, texto, cor):
+    return fonte.render(texto, True, cor)
+
+# [BLOCO DO ATLAS DE SPRITES (cada estado do nó pré-renderizado com glow e rótulo)]
+
+SPRITE_OFF = 0
+SPRITE_FILA = 1
+SPRITE_VISITADO = 2
+SPRITE_HOVER = 3
+SPRITE_HOVER_FILA = 4
+
+# estado: (preenchimento, borda, raio, cor do glow, raio do glow, cor do rótulo)
+ESTILOS_SPRITE = {
+    SPRITE_OFF:        (C_NODE_OFF, C_NODE_BORDER, 18, None, 0, C_TEXT_WHITE),
+    SPRITE_FILA:       (C_NODE_OFF, C_FILA, 18, (*C_FILA, 30), 25, C_TEXT_WHITE),
+    SPRITE_VISITADO:   (C_VISITADO, (200, 255, 230), 18, (*C_VISITADO, 50), 30, C_BG_DARK),
+    SPRITE_HOVER:      (C_NODE_OFF, (255, 255, 255), 20, None, 0, C_TEXT_WHITE),
+    SPRITE_HOVER_FILA: (C_NODE_OFF, (255, 255, 255), 20, (*C_FILA, 30), 25, C_TEXT_WHITE),
+}
 
+def estado_sprite(node, com_hover=True):
+    if node.visitado:
+        return SPRITE_VISITADO
+    if com_hover and node.hover:
+        return SPRITE_HOVER_FILA if node.na_fila else SPRITE_HOVER
+    return SPRITE_FILA if node.na_fila else SPRITE_OFF
 
-# [BALANCEAMENTO DE DIFICULDADE]
-DIFICULDADES = {
-    "Noob":   {"camadas": 2, "ciclos": 0.0, "min_nos": 1, "max_nos": 2},
-    "Fácil":  {"camadas": 3, "ciclos": 0.1, "min_nos": 2, "max_nos": 3},
-    "Normal": {"camadas": 4, "ciclos": 0.3, "min_nos": 2, "max_nos": 4},
-    "Pro":    {"camadas": 5, "ciclos": 0.5, "min_nos": 3, "max_nos": 5},
-    "Hacker": {"camadas": 7, "ciclos": 0.8, "min_nos": 6, "max_nos": 8}
-}
+# Um sprite por (id, estado), com no máximo LIMITE em memória: ao passear por um nível grande os
+# menos usados saem primeiro (cada um tem 64x64 RGBA, ~16 KB). Cabe com folga o que uma tela mostra.
+class AtlasNos:
+    LIMITE = 2048
 
-ESTADO_MENU = 0
-ESTADO_JOGANDO = 1
-ESTADO_INPUT_NOME = 2
-ESTADO_RANKING = 3
-ESTADO_DERROTA = 4
-
-pygame.init()
-tela = pygame.display.set_mode((LARGURA, ALTURA))
-pygame.display.set_caption("Neural Graph: Arcade Edition")
-
-def get_font(size, bold=False):
-    fonts = ['Segoe UI', 'Roboto', 'Helvetica', 'Arial']
-    return pygame.font.SysFont(fonts, size, bold=bold)
-
-fonte_ui = get_font(18)
-fonte_bold = get_font(22, bold=True)
-fonte_titulo = get_font(50, bold=True)
-fonte_mini = get_font(14)
-
-# [BLOCO DA CLASSE NODE (se já foi visitado, se o mouse está em cima, etc).]
-
-class Node:
-    def __init__(self, id, x, y):
-        self.id = id
-        self.x = x
-        self.y = y
-        self.vizinhos = []
-        self.visitado = False
-        self.na_fila = False 
-        self.hover = False
-
-    def desenhar(self, tela, surface_glow):
-        fill_color = C_NODE_OFF
-        border_color = C_NODE_BORDER
-        radius = 18
-        
-        if self.visitado:
-            fill_color = C_VISITADO
-            border_color = (200, 255, 230)
-            pygame.draw.circle(surface_glow, (*C_VISITADO, 50), (self.x, self.y), 30)
-        elif self.na_fila:
-            fill_color = C_NODE_OFF
-            border_color = C_FILA
-            pygame.draw.circle(surface_glow, (*C_FILA, 30), (self.x, self.y), 25)
-
-        if self.hover and not self.visitado:
-            border_color = (255, 255, 255)
-            radius = 20
-
-        pygame.draw.circle(tela, fill_color, (self.x, self.y), radius)
-        pygame.draw.circle(tela, border_color, (self.x, self.y), radius, 2)
-        
-        text_color = C_BG_DARK if self.visitado else C_TEXT_WHITE
-        txt = fonte_bold.render(str(self.id), True, text_color)
-        tela.blit(txt, (self.x - txt.get_width()//2, self.y - txt.get_height()//2))
+    def __init__(self):
+        self.sprites = OrderedDict()
+
+    # Pré-renderiza os estados em que os nós de um nível começam; os demais saem sob demanda.
+    def preparar(self, nodes):
+        for node in nodes:
+            self.sprite(node.id, estado_sprite(node, com_hover=False))
+
+    def sprite(self, id, estado):
+        chave = (id, estado)
+        sprite = self.sprites.get(chave)
+        if sprite is None:
+            sprite = self.sprites[chave] = self.renderizar(id, estado)
+            if len(self.sprites) > self.LIMITE:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(chave)
+        return sprite
+
+    # O glow fica por baixo fora do círculo e tinge o círculo por cima, como um glow sobreposto ao nó.
+    def renderizar(self, id, estado):
+        fill_color, border_color, radius, cor_glow, raio_glow, text_color = ESTILOS_SPRITE[estado]
+        txt = fonte_bold.render(str(id), True, text_color)
+        lado = max(64, txt.get_width() + 4)
+        centro = (lado // 2, lado // 2)
+
+        sprite = pygame.Surface((lado, lado), pygame.SRCALPHA)
+        if cor_glow:
+            pygame.draw.circle(sprite, cor_glow, centro, raio_glow)
+
+        corpo = pygame.Surface((lado, lado), pygame.SRCALPHA)
+        pygame.draw.circle(corpo, fill_color, centro, radius)
+        pygame.draw.circle(corpo, border_color, centro, radius, 2)
+        corpo.blit(txt, (centro[0] - txt.get_width()//2, centro[1] - txt.get_height()//2))
+        sprite.blit(corpo, (0, 0))
+
+        if cor_glow:
+            tinta = pygame.Surface((lado, lado), pygame.SRCALPHA)
+            pygame.draw.circle(tinta, cor_glow, centro, radius)
+            sprite.blit(tinta, (0, 0))
+        return sprite.convert_alpha()
+
+    def item(self, node, centro, com_hover=True):
+        sprite = self.sprite(node.id, estado_sprite(node, com_hover))
+        meio = sprite.get_width() // 2
+        return (sprite, (centro[0] - meio, centro[1] - meio))
+
+# [BLOCO DA CÂMERA (pan/zoom sobre o mundo; níveis que cabem na tela ficam sempre em 0,0 com zoom 1)]
+
+ZOOM_DETALHE = 0.6    # abaixo disso os nós viram pontos, sem rótulo nem glow
+ZOOM_AGREGADO = 0.2   # abaixo disso as arestas são agregadas por célula
+TAMANHO_AGREGADO = 400
+
+class Camera:
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.zoom = 1.0
+        self.largura_mundo, self.altura_mundo = LARGURA, ALTURA
+
+    def enquadrar(self, largura_mundo, altura_mundo, centro_x):
+        self.largura_mundo, self.altura_mundo = largura_mundo, altura_mundo
+        self.zoom = 1.0
+        self.x = centro_x - LARGURA / 2
+        self.y = 0.0
+        self.limitar()
+
+    @property
+    def zoom_minimo(self):
+        return min(1.0, LARGURA / self.largura_mundo, ALTURA / self.altura_mundo)
+
+    # Eixos maiores que a tela ficam presos às bordas do mundo; menores ficam centralizados.
+    def limitar(self):
+        self.zoom = max(self.zoom_minimo, min(1.0, self.zoom))
+        for eixo, tamanho_tela, tamanho_mundo in (("x", LARGURA, self.largura_mundo), ("y", ALTURA, self.altura_mundo)):
+            visivel = tamanho_tela / self.zoom
+            if visivel >= tamanho_mundo:
+                setattr(self, eixo, (tamanho_mundo - visivel) / 2)
+            else:
+                setattr(self, eixo, max(0.0, min(tamanho_mundo - visivel, getattr(self, eixo))))
+
+    def mover(self, dx_tela, dy_tela):
+        self.x += dx_tela / self.zoom
+        self.y += dy_tela / self.zoom
+        self.limitar()
+
+    # Zoom ancorado no cursor: o ponto do mundo sob o mouse continua sob o mouse.
+    def aplicar_zoom(self, fator, pos_tela):
+        wx, wy = self.para_mundo(*pos_tela)
+        self.zoom *= fator
+        self.limitar()
+        self.x = wx - pos_tela[0] / self.zoom
+        self.y = wy - pos_tela[1] / self.zoom
+        self.limitar()
+
+    @property
+    def chave(self):
+        return (round(self.x, 2), round(self.y, 2), round(self.zoom, 4))
+
+    def para_tela(self, wx, wy):
+        return (int((wx - self.x) * self.zoom), int((wy - self.y) * self.zoom))
+
+    def para_mundo(self, sx, sy):
+        return (sx / self.zoom + self.x, sy / self.zoom + self.y)
+
+# Áreas fixas do HUD que mudam sozinhas durante a partida.
+RET_HUD = pygame.Rect(0, 0, LARGURA, 80)
+RET_TEMPO = pygame.Rect(LARGURA//2 - 80, 45, 160, 36)
+
+# Postado pela thread do placar online: acorda o laço ocioso para o ranking se redesenhar.
+EVENTO_PLACAR = pygame.event.custom_type()
+
+def retangulo_aresta(x1, y1, x2, y2):
+    return pygame.Rect(min(x1, x2) - 2, min(y1, y2) - 2, abs(x1 - x2) + 5, abs(y1 - y2) + 5)
 
 # [BLOCO DA CLASSE PRINCIPAL (gerencia toda a lógica do jogo)]
 
-class GraphGame:
-    def __init__(self):
-        self.nodes = {}
-        self.edges = []
-        self.no_atual = None
-        self.modo = "BFS"
-        self.fila_esperada = deque() 
-        self.gabarito = []
-        
-        self.estado = ESTADO_MENU
-        self.energia_max = 100
-        self.energia_atual = 100
-        self.dificuldade_atual = "Normal"
-        
-        self.start_ticks = 0
-        self.tempo_final = 0.0
-        self.pontuacao_final = 0
-        self.nome_jogador = ""
-        self.recordes = self.carregar_recordes()
+class GraphGame(NucleoJogo):
+    def __init__(self, pre_gerar=True, recordes=None):
+        super().__init__(recordes)
 
         self.botoes_menu = []
         self.botao_bfs = pygame.Rect(0,0,0,0)
         self.botao_dfs = pygame.Rect(0,0,0,0)
         self.botao_voltar_menu = pygame.Rect(0,0,0,0)
+        self.botao_diario = pygame.Rect(0,0,0,0)
+        self.botao_infinito = pygame.Rect(0,0,0,0)
+        self.desafio_diario = False
+        self.semente_fixa = None
+        self.placar = None
+        self.pasta_replays = None
+
+        # Camadas estáticas: o grid nunca muda e o grafo só muda quando um nó é visitado.
+        self.camada_grid = None
+        self.camada_grafo = None
+        self.chave_camada = None
+        self.arestas_agregadas = None
+        self.atlas = AtlasNos()
+        self.camera = Camera()
+        self.telas_cache = {}
+        # Último texto do cronômetro e sua superfície: muda a cada 0,1 s e, no render_texto, tiraria
+        # do cache os textos estáticos.
+        self.cronometro = (None, None)
+
+        # O que está na tela agora, para o próximo quadro só reenviar o que mudou.
+        self.sujos = []
+        self.redesenho_total = True
+        self.quadro_anterior = None
+        self.hover_desenhado = None
+        self.marca_desenhada = None
+        self.hud_desenhado = None
+        self.tempo_desenhado = None
+        self.telas_usadas = []
+        self.quadro_assinatura = None
+
+        # Enquanto o jogador está no menu, as fases do modo escolhido já vão sendo geradas.
+        if pre_gerar:
+            self.reserva = ReservaFases()
+            self.abastecer_reserva()
+        self.banco = abrir_banco()
+
+    def relogio(self):
+        return pygame.time.get_ticks()
+
+    def ao_gerar_fase(self):
+        self.camera.enquadrar(self.largura_mundo, self.altura_mundo, self.nodes[0].x)
+        self.arestas_agregadas = None
+        x0, y0 = self.camera.para_mundo(0, 0)
+        x1, y1 = self.camera.para_mundo(LARGURA, ALTURA)
+        self.atlas.preparar(self.nodes[id] for id in self.indice.nos_em(x0, y0, x1, y1))
+        self.construir_camada_grafo()
+
+    def ao_visitar(self, node):
+        self.atualizar_agregadas(node)
+        self.atualizar_camada_grafo(node)
+        # No modo infinito a câmera desce junto quando o jogador chega perto da borda de baixo.
+        if self.infinito:
+            _, cy = self.camera.para_tela(node.x, node.y)
+            if cy > ALTURA * 0.7:
+                self.camera.mover(0, cy - ALTURA * 0.4)
+
+    # Modo infinito: só a camada nova entra no atlas, nas agregadas e na camada do grafo.
+    def ao_crescer(self, primeiro_no, primeira_aresta):
+        self.camera.altura_mundo = self.altura_mundo
+        if self.arestas_agregadas is not None:
+            self.anexar_agregadas(primeiro_no, primeira_aresta)
+        if self.camada_grafo is None: return
+        if self.camera.zoom < ZOOM_AGREGADO:
+            self.chave_camada = None
+            self.redesenho_total = True
+            return
 
-    def carregar_recordes(self):
-        if not os.path.exists(ARQUIVO_RECORDES):
-            return {}
-        try:
-            with open(ARQUIVO_RECORDES, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-
-    def salvar_recorde(self):
-        chave = f"{self.modo}_{self.dificuldade_atual}"
-        if chave not in self.recordes:
-            self.recordes[chave] = []
-        
-        self.recordes[chave].append([self.nome_jogador, self.pontuacao_final, self.tempo_final])
-        self.recordes[chave].sort(key=lambda x: x[1], reverse=True)
-        self.recordes[chave] = self.recordes[chave][:5]
-        
-        with open(ARQUIVO_RECORDES, 'w') as f:
-            json.dump(self.recordes, f)
-
-    # Adiciona arestas bidirecionais entre nós e prepara o início de um nível.
-    def add_edge(self, u, v):
-        if self.nodes[v] not in self.nodes[u].vizinhos:
-            self.nodes[u].vizinhos.append(self.nodes[v])
-            self.nodes[v].vizinhos.append(self.nodes[u])
-            self.edges.append((self.nodes[u], self.nodes[v]))
-
-    def iniciar_nivel(self, nome_dificuldade):
-        self.dificuldade_atual = nome_dificuldade
-        config = DIFICULDADES[nome_dificuldade]
-        self.gerar_fase(config)
-        self.estado = ESTADO_JOGANDO
-        self.start_ticks = pygame.time.get_ticks()
-
-    def gerar_fase(self, config):
-        self.nodes = {}
-        self.edges = []
-        self.gabarito = []
-        self.energia_atual = self.energia_max
-        
-        num_camadas = config["camadas"]
-        densidade_ciclos = config["ciclos"]
-        min_nos = config["min_nos"]
-        max_nos = config["max_nos"]
-
-        margem_x = 80
-        margem_y = 120
-        altura_nivel = (ALTURA - margem_y - 80) // num_camadas
+        cam = self.camera
+        xs, ys, arestas = self.grafo.xs, self.grafo.ys, self.grafo.arestas
+        regiao = None
+        for id in range(primeiro_no, len(self.grafo)):
+            cx, cy = cam.para_tela(xs[id], ys[id])
+            ret = pygame.Rect(cx - 30, cy - 30, 61, 61)
+            regiao = ret if regiao is None else regiao.union(ret)
+        for a in range(primeira_aresta, self.grafo.num_arestas):
+            u, v = arestas[2 * a], arestas[2 * a + 1]
+            regiao.union_ip(retangulo_aresta(*cam.para_tela(xs[u], ys[u]), *cam.para_tela(xs[v], ys[v])))
+        regiao = regiao.clip(self.camada_grafo.get_rect())
+        if regiao.width and regiao.height:
+            self.atlas.preparar(self.nodes[id] for id in range(primeiro_no, len(self.grafo)))
+            self.desenhar_regiao_grafo(regiao)
+            self.sujos.append(regiao)
+
+    # O núcleo trabalha em coordenadas do mundo; o mouse chega em coordenadas de tela.
+    def update_hover(self, pos_mouse):
+        super().update_hover(self.camera.para_mundo(*pos_mouse))
 
-        id_counter = 0
-        
-        def validar_posicao(x, y, nodes_existentes, raio_min=55):
-            for node in nodes_existentes:
-                dist = math.hypot(x - node.x, y - node.y)
-                if dist < raio_min:
-                    return False
-            return True
-
-        root = Node(id_counter, LARGURA // 2, margem_y)
-        self.nodes[id_counter] = root
-        camada_anterior = [root] 
-        id_counter += 1
-
-        for i in range(1, num_camadas + 1):
-            y_base = margem_y + (i * altura_nivel)
-            qtd_nos = random.randint(min_nos, max_nos)
-            largura_setor = (LARGURA - 2 * margem_x) // qtd_nos
-            camada_atual = []
-            
-            for j in range(qtd_nos):
-                centro_setor = margem_x + (j * largura_setor) + (largura_setor // 2)
-                
-                pos_x, pos_y = centro_setor, y_base
-                posicao_valida = False
-                
-                tentativas = 0
-                while not posicao_valida and tentativas < 15:
-                    jitter_x = random.randint(-40, 40) 
-                    jitter_y = random.randint(-25, 25)
-                    
-                    teste_x = centro_setor + jitter_x
-                    teste_y = y_base + jitter_y
-                    
-                    teste_x = max(40, min(LARGURA - 40, teste_x))
-                    teste_y = max(40, min(ALTURA - 40, teste_y))
-
-                    if validar_posicao(teste_x, teste_y, self.nodes.values()):
-                        pos_x, pos_y = teste_x, teste_y
-                        posicao_valida = True
-                    
-                    tentativas += 1
-
-                novo_no = Node(id_counter, pos_x, pos_y)
-                self.nodes[id_counter] = novo_no
-                camada_atual.append(novo_no)
-                id_counter += 1
-                
-                pai = random.choice(camada_anterior)
-                self.add_edge(pai.id, novo_no.id)
-
-            chance_ciclo = densidade_ciclos
-            if self.modo == "DFS": chance_ciclo *= 0.5 
-
-            for no in camada_atual:
-                if random.random() < chance_ciclo and id_counter > 5:
-                    alvo_id = random.randint(0, id_counter - 2)
-                    if alvo_id != no.id:
-                        dist_alvo = math.hypot(self.nodes[alvo_id].x - no.x, self.nodes[alvo_id].y - no.y)
-                        if dist_alvo < 300: 
-                            self.add_edge(no.id, alvo_id)
-
-            camada_anterior = camada_atual 
-
-        self.no_atual = self.nodes[0]
-        self.no_atual.visitado = True
-        self.recalcular_gabarito()
-
-    # [BLOCO DO ALGORITMO RESOLVEDOR (Solver) define a ordem correta em que os nós devem ser clicados.]
-    def recalcular_gabarito(self):
-        self.gabarito = []
-        start_node = self.nodes[0]
-        
-        if self.modo == "BFS":
-            fila = deque([start_node])
-            visitados = {start_node.id}
-            while fila:
-                atual = fila.popleft()
-                if atual.id != 0: self.gabarito.append(atual.id)
-                vizinhos_ordenados = sorted(atual.vizinhos, key=lambda n: n.id)
-                for vizinho in vizinhos_ordenados:
-                    if vizinho.id not in visitados:
-                        visitados.add(vizinho.id)
-                        fila.append(vizinho)
-        
-        elif self.modo == "DFS":
-            pilha = [start_node]
-            visitados = set()
-            while pilha:
-                atual = pilha.pop()
-                if atual.id not in visitados:
-                    visitados.add(atual.id)
-                    if atual.id != 0: self.gabarito.append(atual.id)
-                    vizinhos_ordenados = sorted(atual.vizinhos, key=lambda n: n.id, reverse=True)
-                    for vizinho in vizinhos_ordenados:
-                        if vizinho.id not in visitados:
-                            pilha.append(vizinho)
-                            
     # [BLOCO DE INPUT DO JOGADOR (mouse e teclado)]
     def processar_clique(self, pos_mouse):
         if self.estado == ESTADO_MENU:
             if self.botao_bfs.collidepoint(pos_mouse):
                 self.modo = "BFS"
+                self.abastecer_reserva()
             elif self.botao_dfs.collidepoint(pos_mouse):
                 self.modo = "DFS"
+                self.abastecer_reserva()
+            elif self.botao_diario.collidepoint(pos_mouse):
+                self.desafio_diario = not self.desafio_diario
+            elif self.botao_infinito.collidepoint(pos_mouse):
+                self.iniciar_nivel(INFINITO, self.semente_escolhida())
             
             for nome, rect in self.botoes_menu:
                 if rect.collidepoint(pos_mouse):
-                    self.iniciar_nivel(nome)
+                    self.iniciar_nivel(nome, self.semente_escolhida())
             return
         
         if self.estado == ESTADO_RANKING:
@@ -286,38 +319,61 @@ class GraphGame:
                 self.estado = ESTADO_MENU
             return
 
-        if self.estado != ESTADO_JOGANDO:
-            return
+        self.clicar(self.camera.para_mundo(*pos_mouse))
 
-        for id, node in self.nodes.items():
-            dist = math.hypot(pos_mouse[0] - node.x, pos_mouse[1] - node.y)
-            if dist < 30:
-                self.validar_movimento(node)
-                break
+    # Semente fixa (--semente) > desafio diário > sorteada (e aí pode vir da reserva).
+    def semente_escolhida(self):
+        if self.semente_fixa is not None:
+            return self.semente_fixa
+        if self.desafio_diario:
+            return semente_diaria()
+        return None
 
-    def validar_movimento(self, node_clicado):
-        if node_clicado.visitado: return 
-        if not self.gabarito: return
+    def abastecer_reserva(self):
+        if self.reserva is None: return
+        for nome in DIFICULDADES:
+            self.reserva.abastecer(self.modo, nome)
 
-        proximo_correto_id = self.gabarito[0]
-        
-        if node_clicado.id == proximo_correto_id:
-            node_clicado.visitado = True
-            self.no_atual = node_clicado
-            self.gabarito.pop(0)
-            
-            if not self.gabarito:
-                self.tempo_final = (pygame.time.get_ticks() - self.start_ticks) / 1000
-                bonus_energia = int(self.energia_atual * 100)
-                bonus_tempo = int(max(0, 5000 - (self.tempo_final * 10)))
-                self.pontuacao_final = bonus_energia + bonus_tempo
-                self.nome_jogador = "" 
-                self.estado = ESTADO_INPUT_NOME
-        else:
-            self.energia_atual -= 15
-            if self.energia_atual <= 0:
-                self.energia_atual = 0
-                self.estado = ESTADO_DERROTA
+    def posicao_tela(self, id):
+        return self.camera.para_tela(self.grafo.xs[id], self.grafo.ys[id])
+
+    def processar_camera(self, evento):
+        if self.estado != ESTADO_JOGANDO: return
+        if evento.type == pygame.MOUSEMOTION and (evento.buttons[1] or evento.buttons[2]):
+            self.camera.mover(-evento.rel[0], -evento.rel[1])
+        elif evento.type == pygame.MOUSEWHEEL:
+            self.camera.aplicar_zoom(1.15 ** evento.y, pygame.mouse.get_pos())
+
+    # Setas/WASD movem a câmera de forma contínua; +/- aproximam e afastam pelo centro da tela.
+    def atualizar_camera(self, teclas, dt):
+        if self.estado != ESTADO_JOGANDO: return False
+        passo = 700 * dt
+        dx = (teclas[pygame.K_RIGHT] or teclas[pygame.K_d]) - (teclas[pygame.K_LEFT] or teclas[pygame.K_a])
+        dy = (teclas[pygame.K_DOWN] or teclas[pygame.K_s]) - (teclas[pygame.K_UP] or teclas[pygame.K_w])
+        if dx or dy:
+            self.camera.mover(dx * passo, dy * passo)
+        zoom = (teclas[pygame.K_EQUALS] or teclas[pygame.K_KP_PLUS]) - (teclas[pygame.K_MINUS] or teclas[pygame.K_KP_MINUS])
+        if zoom:
+            self.camera.aplicar_zoom(1.0 + zoom * 1.5 * dt, (LARGURA // 2, ALTURA // 2))
+        return bool(dx or dy or zoom)
+
+    # O recorde local continua sendo gravado; o placar online recebe uma cópia (com o replay, para
+    # o servidor conferir a pontuação) sem travar o quadro.
+    def salvar_recorde(self):
+        super().salvar_recorde()
+        if not (self.placar or self.pasta_replays): return
+        chave = f"{self.modo}_{self.dificuldade_atual}"
+        replay = Replay.de_partida(self).para_bytes()
+        if self.pasta_replays:
+            nome = f"{chave}_{self.semente}_{time.strftime('%Y%m%d-%H%M%S')}{EXTENSAO_REPLAY}"
+            try:
+                with open(os.path.join(self.pasta_replays, nome), "wb") as f:
+                    f.write(replay)
+            except OSError as erro:
+                warnings.warn(f"Replay não gravado: {erro}")
+        if self.placar:
+            self.placar.enviar(chave, self.nome_jogador, self.pontuacao_final, self.tempo_final, replay)
+            self.placar.pedir_top(chave)
 
     def processar_input_nome(self, evento):
         if evento.key == pygame.K_RETURN:
@@ -331,19 +387,130 @@ class GraphGame:
             if len(self.nome_jogador) < 12:
                 self.nome_jogador += evento.unicode
 
-    def update_hover(self, pos_mouse):
-        if self.estado != ESTADO_JOGANDO: return
-        for node in self.nodes.values():
-            dist = math.hypot(pos_mouse[0] - node.x, pos_mouse[1] - node.y)
-            node.hover = (dist < 25)
-
-
-    def desenhar_background(self, tela):
-        tamanho_grid = 40
-        for x in range(0, LARGURA, tamanho_grid):
-            pygame.draw.line(tela, C_BG_GRID, (x, 0), (x, ALTURA), 1)
-        for y in range(0, ALTURA, tamanho_grid):
-            pygame.draw.line(tela, C_BG_GRID, (0, y), (LARGURA, y), 1)
+    # [BLOCO DE CAMADAS EM CACHE (grid e grafo renderizados uma vez e reaproveitados a cada frame)]
+    def obter_camada_grid(self):
+        if self.camada_grid is None:
+            self.camada_grid = pygame.Surface((LARGURA, ALTURA)).convert()
+            self.camada_grid.fill(C_BG_DARK)
+            tamanho_grid = 40
+            for x in range(0, LARGURA, tamanho_grid):
+                pygame.draw.line(self.camada_grid, C_BG_GRID, (x, 0), (x, ALTURA), 1)
+            for y in range(0, ALTURA, tamanho_grid):
+                pygame.draw.line(self.camada_grid, C_BG_GRID, (0, y), (LARGURA, y), 1)
+        return self.camada_grid
+
+    def construir_camada_grafo(self):
+        if self.camada_grafo is None:
+            self.camada_grafo = pygame.Surface((LARGURA, ALTURA)).convert()
+        self.chave_camada = (self.camera.chave, id(self.grafo))
+        self.desenhar_regiao_grafo(self.camada_grafo.get_rect())
+
+    # Redesenha só a área afetada pela visita: o próprio nó, seu glow e as arestas que saem dele.
+    def atualizar_camada_grafo(self, node):
+        if self.camada_grafo is None: return
+        if self.camera.zoom < ZOOM_AGREGADO:
+            self.chave_camada = None  # a aresta agregada pode cruzar a tela toda
+            self.redesenho_total = True
+            return
+        cam = self.camera
+        cx, cy = cam.para_tela(node.x, node.y)
+        regiao = pygame.Rect(cx - 30, cy - 30, 61, 61)
+        # Os vizinhos entram inteiros: os que acabaram de ser descobertos trocam de sprite (NA_FILA).
+        for vizinho in node.vizinhos:
+            vx, vy = cam.para_tela(vizinho.x, vizinho.y)
+            regiao.union_ip(retangulo_aresta(cx, cy, vx, vy))
+            regiao.union_ip(pygame.Rect(vx - 32, vy - 32, 65, 65))
+        regiao = regiao.clip(self.camada_grafo.get_rect())
+        self.desenhar_regiao_grafo(regiao)
+        self.sujos.append(regiao)
+
+    # Só o que está dentro da região (mais a margem do glow) é consultado no índice e desenhado.
+    def desenhar_regiao_grafo(self, regiao):
+        camada = self.camada_grafo
+        camada.set_clip(regiao)
+        camada.blit(self.obter_camada_grid(), regiao.topleft, regiao)
+
+        cam = self.camera
+        x0, y0 = cam.para_mundo(regiao.left - 32, regiao.top - 32)
+        x1, y1 = cam.para_mundo(regiao.right + 32, regiao.bottom + 32)
+        grafo = self.grafo
+        xs, ys, flags, arestas = grafo.xs, grafo.ys, grafo.flags, grafo.arestas
+
+        if cam.zoom < ZOOM_AGREGADO:
+            self.desenhar_arestas_agregadas(camada, (x0, y0, x1, y1))
+        else:
+            for a in self.indice.arestas_em(x0, y0, x1, y1):
+                u, v = arestas[2 * a], arestas[2 * a + 1]
+                pu, pv = cam.para_tela(xs[u], ys[u]), cam.para_tela(xs[v], ys[v])
+                if not regiao.colliderect(retangulo_aresta(*pu, *pv)): continue
+                visitada = flags[u] & flags[v] & VISITADO
+                cor = C_VISITADO if visitada else C_EDGE
+                largura = 2 if visitada else 1
+                pygame.draw.line(camada, cor, pu, pv, largura)
+
+        ids = self.indice.nos_em(x0, y0, x1, y1)
+        if cam.zoom >= ZOOM_DETALHE:
+            camada.blits([self.atlas.item(self.nodes[id], cam.para_tela(xs[id], ys[id]), com_hover=False)
+                          for id in ids], doreturn=False)
+        else:
+            raio = max(1, round(18 * cam.zoom))
+            for id in ids:
+                cor = C_VISITADO if flags[id] & VISITADO else (C_FILA if flags[id] & NA_FILA else C_NODE_BORDER)
+                pygame.draw.circle(camada, cor, cam.para_tela(xs[id], ys[id]), raio)
+        camada.set_clip(None)
+
+    # [BLOCO DE ARESTAS AGREGADAS (zoom muito baixo: uma linha por par de células, entre os centróides)]
+    def celula_agregada(self, id):
+        return (self.grafo.xs[id] // TAMANHO_AGREGADO, self.grafo.ys[id] // TAMANHO_AGREGADO)
+
+    def construir_agregadas(self):
+        self.somas_agregadas = {}
+        self.centroides = {}
+        # par de células -> [arestas, arestas já visitadas]
+        self.arestas_agregadas = {}
+        self.anexar_agregadas(0, 0)
+
+    # Soma os nós a partir de primeiro_no e as arestas a partir de primeira_aresta (o modo infinito
+    # passa só a camada nova).
+    def anexar_agregadas(self, primeiro_no, primeira_aresta):
+        grafo = self.grafo
+        for id in range(primeiro_no, len(grafo)):
+            celula = self.celula_agregada(id)
+            soma = self.somas_agregadas.setdefault(celula, [0, 0, 0])
+            soma[0] += grafo.xs[id]
+            soma[1] += grafo.ys[id]
+            soma[2] += 1
+            self.centroides[celula] = (soma[0] / soma[2], soma[1] / soma[2])
+
+        arestas = grafo.arestas
+        for k in range(2 * primeira_aresta, len(arestas), 2):
+            u, v = arestas[k], arestas[k + 1]
+            cu, cv = self.celula_agregada(u), self.celula_agregada(v)
+            if cu == cv: continue
+            par = (cu, cv) if cu < cv else (cv, cu)
+            contagem = self.arestas_agregadas.setdefault(par, [0, 0])
+            contagem[0] += 1
+            contagem[1] += bool(grafo.flags[u] & grafo.flags[v] & VISITADO)
+
+    def atualizar_agregadas(self, node):
+        if self.arestas_agregadas is None: return
+        cu = self.celula_agregada(node.id)
+        for vizinho in node.vizinhos:
+            if not vizinho.visitado: continue
+            cv = self.celula_agregada(vizinho.id)
+            if cu != cv:
+                self.arestas_agregadas[(cu, cv) if cu < cv else (cv, cu)][1] += 1
+
+    def desenhar_arestas_agregadas(self, camada, area):
+        if self.arestas_agregadas is None:
+            self.construir_agregadas()
+        x0, y0, x1, y1 = area
+        cam = self.camera
+        for (cu, cv), (total, visitadas) in self.arestas_agregadas.items():
+            (ux, uy), (vx, vy) = self.centroides[cu], self.centroides[cv]
+            if max(ux, vx) < x0 or min(ux, vx) > x1 or max(uy, vy) < y0 or min(uy, vy) > y1: continue
+            cor = C_VISITADO if visitadas * 2 >= total else C_EDGE
+            pygame.draw.line(camada, cor, cam.para_tela(ux, uy), cam.para_tela(vx, vy), 1)
 
     def draw_button(self, tela, rect, text, active=False, hover=False, custom_color=None):
         cor_base = custom_color if custom_color else C_BTN_NORMAL
@@ -352,81 +519,141 @@ class GraphGame:
         
         pygame.draw.rect(tela, cor_fundo, rect, border_radius=12)
         pygame.draw.rect(tela, cor_borda, rect, 2, border_radius=12)
-        txt_surf = fonte_bold.render(text, True, C_TEXT_WHITE)
+        txt_surf = render_texto(fonte_bold, text, C_TEXT_WHITE)
         tela.blit(txt_surf, (rect.centerx - txt_surf.get_width()//2, rect.centery - txt_surf.get_height()//2))
 
+    # [BLOCO DAS TELAS DE UI (compostas uma vez por chave e reaproveitadas enquanto a chave não muda)]
+    def obter_tela(self, nome, chave, compor):
+        self.telas_usadas.append((nome, chave))
+        atual = self.telas_cache.get(nome)
+        if atual is None or atual[0] != chave:
+            atual = self.telas_cache[nome] = (chave, compor())
+        return atual[1]
+
+    def superficie_overlay(self, cor, alpha):
+        overlay = pygame.Surface((LARGURA, ALTURA), pygame.SRCALPHA)
+        overlay.fill((*cor, alpha))
+        return overlay
+
     def desenhar_menu(self, tela, pos_mouse):
+        bw, bh = 240, 50
+        gap = 20
+        start_x = LARGURA//2 - bw - gap//2
+        self.botao_bfs = pygame.Rect(start_x, 200, bw, bh)
+        self.botao_dfs = pygame.Rect(start_x + bw + gap, 200, bw, bh)
+
+        # Com mais de 5 níveis os botões se dividem em duas colunas para caber na tela.
+        self.botoes_menu = []
+        y_start = 360
+        colunas = 1 if len(DIFICULDADES) <= 5 else 2
+        linhas = -(-len(DIFICULDADES) // colunas)
+        x_start = LARGURA//2 - (colunas * 240 + (colunas - 1) * gap) // 2
+        for i, nome in enumerate(DIFICULDADES.keys()):
+            coluna, linha = divmod(i, linhas)
+            rect = pygame.Rect(x_start + coluna * (240 + gap), y_start + (linha * 60), 240, 45)
+            self.botoes_menu.append((nome, rect))
+
+        self.botao_diario = pygame.Rect(LARGURA//2 - 310, y_start + linhas * 60 + 10, 300, 40)
+        self.botao_infinito = pygame.Rect(LARGURA//2 + 10, y_start + linhas * 60 + 10, 300, 40)
+
+        botoes = [("BFS", self.botao_bfs), ("DFS", self.botao_dfs), ("DIARIO", self.botao_diario),
+                  (INFINITO, self.botao_infinito)] + self.botoes_menu
+        hover = next((nome for nome, rect in botoes if rect.collidepoint(pos_mouse)), None)
+        chave = (self.modo, self.desafio_diario, hover)
+        tela.blit(self.obter_tela("menu", chave, lambda: self.compor_menu(hover)), (0, 0))
+
+    def compor_menu(self, hover):
+        tela = self.obter_camada_grid().copy()
+
         tit = "NEURAL GRAPH"
-        sombra = fonte_titulo.render(tit, True, (0, 0, 0))
-        texto = fonte_titulo.render(tit, True, C_VISITADO)
+        sombra = render_texto(fonte_titulo, tit, (0, 0, 0))
+        texto = render_texto(fonte_titulo, tit, C_VISITADO)
         tela.blit(sombra, (LARGURA//2 - texto.get_width()//2 + 4, 54))
         tela.blit(texto, (LARGURA//2 - texto.get_width()//2, 50))
         
-        sub = fonte_ui.render("Arcade Edition: Score & Speed", True, C_TEXT_GREY)
+        sub = render_texto(fonte_ui, "Arcade Edition: Score & Speed", C_TEXT_GREY)
         tela.blit(sub, (LARGURA//2 - sub.get_width()//2, 100))
 
-        lbl_mode = fonte_bold.render("SELECIONE O PROTOCOLO:", True, C_TEXT_WHITE)
+        lbl_mode = render_texto(fonte_bold, "SELECIONE O PROTOCOLO:", C_TEXT_WHITE)
         tela.blit(lbl_mode, (LARGURA//2 - lbl_mode.get_width()//2, 160))
 
-        bw, bh = 240, 50
-        gap = 20
-        start_x = LARGURA//2 - bw - gap//2
-        self.botao_bfs = pygame.Rect(start_x, 200, bw, bh)
-        self.botao_dfs = pygame.Rect(start_x + bw + gap, 200, bw, bh)
-
-        self.draw_button(tela, self.botao_bfs, "BFS (Largura)", active=(self.modo=="BFS"), hover=self.botao_bfs.collidepoint(pos_mouse))
-        self.draw_button(tela, self.botao_dfs, "DFS (Profund.)", active=(self.modo=="DFS"), hover=self.botao_dfs.collidepoint(pos_mouse))
+        self.draw_button(tela, self.botao_bfs, "BFS (Largura)", active=(self.modo=="BFS"), hover=(hover == "BFS"))
+        self.draw_button(tela, self.botao_dfs, "DFS (Profund.)", active=(self.modo=="DFS"), hover=(hover == "DFS"))
 
         desc_txt = "Onda expandindo em camadas." if self.modo == "BFS" else "Caminho único até o fim."
-        desc = fonte_mini.render(desc_txt, True, C_FILA)
+        desc = render_texto(fonte_mini, desc_txt, C_FILA)
         tela.blit(desc, (LARGURA//2 - desc.get_width()//2, 260))
 
-        lbl_dif = fonte_bold.render("DENSIDADE DA REDE:", True, C_TEXT_WHITE)
+        lbl_dif = render_texto(fonte_bold, "DENSIDADE DA REDE:", C_TEXT_WHITE)
         tela.blit(lbl_dif, (LARGURA//2 - lbl_dif.get_width()//2, 320))
 
-        self.botoes_menu = []
-        y_start = 360
-        for i, nome in enumerate(DIFICULDADES.keys()):
-            rect = pygame.Rect(LARGURA//2 - 120, y_start + (i * 60), 240, 45)
-            self.botoes_menu.append((nome, rect))
-            self.draw_button(tela, rect, nome, hover=rect.collidepoint(pos_mouse))
+        for nome, rect in self.botoes_menu:
+            self.draw_button(tela, rect, nome, hover=(hover == nome))
+
+        txt_diario = "DESAFIO DIÁRIO: " + ("ON" if self.desafio_diario else "OFF")
+        self.draw_button(tela, self.botao_diario, txt_diario, active=self.desafio_diario, hover=(hover == "DIARIO"))
+        self.draw_button(tela, self.botao_infinito, "MODO INFINITO", hover=(hover == INFINITO))
+        return tela
 
     def desenhar_hud(self, tela):
+        tela.blit(self.obter_tela("hud", self.chave_hud(), self.compor_hud), (0, 0))
+        texto = self.texto_tempo()
+        if texto != self.cronometro[0]:
+            self.cronometro = (texto, fonte_bold.render(texto, True, C_FILA))
+        lbl_time = self.cronometro[1]
+        tela.blit(lbl_time, (LARGURA//2 - lbl_time.get_width()//2, 50))
+
+    def chave_hud(self):
+        return (self.modo, self.dificuldade_atual, self.semente, self.energia_atual, self.restantes,
+                self.visitados, self.altura_mundo)
+
+    def texto_tempo(self):
+        return f"{(self.relogio() - self.start_ticks) / 1000:.1f}s"
+
+    def compor_hud(self):
         panel = pygame.Surface((LARGURA, 80), pygame.SRCALPHA)
         panel.fill(C_UI_PANEL)
         pygame.draw.line(panel, C_NODE_BORDER, (0, 79), (LARGURA, 79), 1)
-        tela.blit(panel, (0,0))
 
-        lbl_modo = fonte_bold.render(f"MODO: {self.modo}", True, C_VISITADO)
-        lbl_dif = fonte_ui.render(f"Nível: {self.dificuldade_atual}", True, C_TEXT_GREY)
-        tela.blit(lbl_modo, (30, 15))
-        tela.blit(lbl_dif, (30, 45))
+        lbl_modo = render_texto(fonte_bold, f"MODO: {self.modo}", C_VISITADO)
+        lbl_dif = render_texto(fonte_ui, f"Nível: {self.dificuldade_atual}", C_TEXT_GREY)
+        panel.blit(lbl_modo, (30, 15))
+        panel.blit(lbl_dif, (30, 45))
+        # A semente identifica a fase: com ela (e o mesmo modo/nível) qualquer um joga a mesma rede.
+        lbl_semente = render_texto(fonte_mini, f"Semente: {self.semente}", C_TEXT_GREY)
+        panel.blit(lbl_semente, (30 + lbl_dif.get_width() + 15, 49))
 
         bar_w, bar_h = 300, 20
         bar_x, bar_y = LARGURA//2 - bar_w//2, 20
-        pygame.draw.rect(tela, (20, 20, 20), (bar_x, bar_y, bar_w, bar_h), border_radius=10)
+        pygame.draw.rect(panel, (20, 20, 20), (bar_x, bar_y, bar_w, bar_h), border_radius=10)
         pct = self.energia_atual / self.energia_max
         cor_vida = C_VISITADO if pct > 0.5 else (C_FILA if pct > 0.2 else C_ERROR)
-        pygame.draw.rect(tela, cor_vida, (bar_x, bar_y, bar_w * pct, bar_h), border_radius=10)
-        pygame.draw.rect(tela, C_TEXT_GREY, (bar_x, bar_y, bar_w, bar_h), 1, border_radius=10)
+        pygame.draw.rect(panel, cor_vida, (bar_x, bar_y, bar_w * pct, bar_h), border_radius=10)
+        pygame.draw.rect(panel, C_TEXT_GREY, (bar_x, bar_y, bar_w, bar_h), 1, border_radius=10)
 
-        tempo_atual = (pygame.time.get_ticks() - self.start_ticks) / 1000
-        lbl_time = fonte_bold.render(f"{tempo_atual:.1f}s", True, C_FILA)
-        tela.blit(lbl_time, (LARGURA//2 - lbl_time.get_width()//2, 50))
+        if self.infinito:
+            lbl_faltam = render_texto(fonte_bold, f"NÓS: {self.visitados - 1}", C_TEXT_WHITE)
+        else:
+            lbl_faltam = render_texto(fonte_bold, f"RESTANTES: {self.restantes}", C_TEXT_WHITE)
+        panel.blit(lbl_faltam, (LARGURA - 30 - lbl_faltam.get_width(), 20))
 
-        lbl_faltam = fonte_bold.render(f"RESTANTES: {len(self.gabarito)}", True, C_TEXT_WHITE)
-        tela.blit(lbl_faltam, (LARGURA - 30 - lbl_faltam.get_width(), 30))
+        if self.largura_mundo > LARGURA or self.altura_mundo > ALTURA:
+            dica = render_texto(fonte_mini, "Botão direito/setas: mover | Roda/+-: zoom", C_TEXT_GREY)
+            panel.blit(dica, (LARGURA - 30 - dica.get_width(), 52))
+        return panel
 
     def desenhar_input_nome(self, tela):
-        overlay = pygame.Surface((LARGURA, ALTURA))
-        overlay.set_alpha(240)
-        overlay.fill((10, 12, 18))
-        tela.blit(overlay, (0,0))
+        chave = (self.pontuacao_final, self.tempo_final, int(self.energia_atual), self.nome_jogador)
+        tela.blit(self.obter_tela("input_nome", chave, self.compor_input_nome), (0, 0))
+
+    def compor_input_nome(self):
+        tela = self.superficie_overlay((10, 12, 18), 240)
         
-        t1 = fonte_titulo.render("NÍVEL CONCLUÍDO!", True, C_VISITADO)
-        t_score = fonte_titulo.render(f"{self.pontuacao_final} Pts", True, C_FILA)
-        t_tempo = fonte_ui.render(f"Tempo: {self.tempo_final:.2f}s | Vida: {int(self.energia_atual)}%", True, C_TEXT_GREY)
-        t_inst = fonte_bold.render("Digite seu nome e pressione ENTER:", True, C_TEXT_WHITE)
+        titulo = "FIM DA LINHA!" if self.infinito else "NÍVEL CONCLUÍDO!"
+        t1 = render_texto(fonte_titulo, titulo, C_VISITADO)
+        t_score = render_texto(fonte_titulo, f"{self.pontuacao_final} Pts", C_FILA)
+        t_tempo = render_texto(fonte_ui, f"Tempo: {self.tempo_final:.2f}s | Vida: {int(self.energia_atual)}%", C_TEXT_GREY)
+        t_inst = render_texto(fonte_bold, "Digite seu nome e pressione ENTER:", C_TEXT_WHITE)
         
         cx = LARGURA//2
         tela.blit(t1, (cx - t1.get_width()//2, 150))
@@ -440,20 +667,30 @@ class GraphGame:
         
         nome_s = fonte_bold.render(self.nome_jogador, True, C_TEXT_WHITE)
         tela.blit(nome_s, (input_rect.centerx - nome_s.get_width()//2, input_rect.centery - nome_s.get_height()//2))
+        return tela
 
     def desenhar_ranking(self, tela, pos_mouse):
-        overlay = pygame.Surface((LARGURA, ALTURA))
-        overlay.set_alpha(250)
-        overlay.fill((10, 12, 18))
-        tela.blit(overlay, (0,0))
-
+        self.botao_voltar_menu = pygame.Rect(LARGURA//2 - 100, ALTURA - 80, 200, 40)
         chave = f"{self.modo}_{self.dificuldade_atual}"
-        top_scores = self.recordes.get(chave, [])
-
-        t1 = fonte_titulo.render(f"RANKING: {self.modo} - {self.dificuldade_atual}", True, C_FILA)
+        # Até a resposta do placar online chegar, mostra o ranking local.
+        online = self.placar.tops.get(chave) if self.placar else None
+        top_scores = tuple(tuple(r) for r in (online if online is not None else self.top_local(chave)))
+        origem = f"placar online: {self.placar.host}:{self.placar.porta}" if online is not None else None
+        hover = self.botao_voltar_menu.collidepoint(pos_mouse)
+        tela.blit(self.obter_tela("ranking", (chave, top_scores, origem, hover),
+                                  lambda: self.compor_ranking(top_scores, origem, hover)), (0, 0))
+
+    def top_local(self, chave):
+        return self.recordes.top(chave) if self.recordes else []
+
+    def compor_ranking(self, top_scores, origem, hover):
+        tela = self.obter_camada_grid().copy()
+        tela.blit(self.superficie_overlay((10, 12, 18), 250), (0,0))
+
+        t1 = render_texto(fonte_titulo, f"RANKING: {self.modo} - {self.dificuldade_atual}", C_FILA)
         tela.blit(t1, (LARGURA//2 - t1.get_width()//2, 50))
         
-        header = fonte_ui.render("RANK   JOGADOR           PONTOS       TEMPO", True, C_TEXT_GREY)
+        header = render_texto(fonte_ui, "RANK   JOGADOR           PONTOS       TEMPO", C_TEXT_GREY)
         tela.blit(header, (LARGURA//2 - 200, 140))
 
         start_y = 180
@@ -464,7 +701,7 @@ class GraphGame:
             str_pts  = f"{pontos:^10}"
             str_tmp  = f"{tempo:.1f}s"
             
-            t_rank = fonte_bold.render(str_rank, True, cor)
+            t_rank = render_texto(fonte_bold, str_rank, cor)
             t_nome = fonte_bold.render(str_nome, True, cor)
             t_pts  = fonte_bold.render(str_pts, True, C_FILA)
             t_tmp  = fonte_bold.render(str_tmp, True, cor)
@@ -476,38 +713,109 @@ class GraphGame:
             tela.blit(t_tmp,  (LARGURA//2 + 180, y_pos))
             pygame.draw.line(tela, C_BG_GRID, (LARGURA//2 - 220, y_pos + 40), (LARGURA//2 + 250, y_pos + 40), 1)
 
-        self.botao_voltar_menu = pygame.Rect(LARGURA//2 - 100, ALTURA - 80, 200, 40)
-        self.draw_button(tela, self.botao_voltar_menu, "VOLTAR AO MENU", hover=self.botao_voltar_menu.collidepoint(pos_mouse))
+        if origem:
+            t_origem = render_texto(fonte_mini, origem, C_TEXT_GREY)
+            tela.blit(t_origem, (LARGURA//2 - t_origem.get_width()//2, ALTURA - 115))
+
+        self.draw_button(tela, self.botao_voltar_menu, "VOLTAR AO MENU", hover=hover)
+        return tela
 
     def desenhar_derrota(self, tela):
-        overlay = pygame.Surface((LARGURA, ALTURA))
-        overlay.set_alpha(200)
-        overlay.fill((20, 10, 10))
-        tela.blit(overlay, (0,0))
-        t1 = fonte_titulo.render("FALHA CRÍTICA", True, C_ERROR)
-        t2 = fonte_bold.render("Pressione [M] para o Menu", True, C_TEXT_WHITE)
+        tela.blit(self.obter_tela("derrota", (), self.compor_derrota), (0, 0))
+
+    def compor_derrota(self):
+        tela = self.superficie_overlay((20, 10, 10), 200)
+        t1 = render_texto(fonte_titulo, "FALHA CRÍTICA", C_ERROR)
+        t2 = render_texto(fonte_bold, "Pressione [M] para o Menu", C_TEXT_WHITE)
         tela.blit(t1, (LARGURA//2 - t1.get_width()//2, ALTURA//2 - 50))
         tela.blit(t2, (LARGURA//2 - t2.get_width()//2, ALTURA//2 + 20))
+        return tela
+
+    # [BLOCO DE RETÂNGULOS SUJOS (devolve só as áreas da tela que mudaram desde o último quadro)]
+    def forcar_redesenho(self):
+        self.redesenho_total = True
 
+    # Quanto o laço pode dormir sem atrasar nada visível: na partida, até o cronômetro mudar.
+    def tempo_ocioso(self):
+        if self.estado != ESTADO_JOGANDO:
+            return 1000
+        return 100 - (self.relogio() - self.start_ticks) % 100
+
+    def retangulo_hover(self):
+        cam = self.camera
+        if not self.no_hover or self.no_hover.visitado or cam.zoom < ZOOM_DETALHE:
+            return None
+        sprite, pos = self.atlas.item(self.no_hover, cam.para_tela(self.no_hover.x, self.no_hover.y))
+        return pygame.Rect(pos, sprite.get_size())
+
+    def retangulo_marca(self):
+        if not self.no_atual:
+            return None
+        cx, cy = self.camera.para_tela(self.no_atual.x, self.no_atual.y)
+        raio = max(2, round(6 * self.camera.zoom))
+        return pygame.Rect(cx - raio - 1, cy - raio - 1, 2 * raio + 3, 2 * raio + 3)
+
+    # Durante a partida, com a câmera parada, só hover, marcador do nó atual, nós visitados,
+    # HUD e cronômetro mudam; cada um contribui com o próprio retângulo.
+    def regioes_sujas(self):
+        sujos, self.sujos = self.sujos, []
+        for anterior, atual in ((self.hover_desenhado, self.retangulo_hover()),
+                                (self.marca_desenhada, self.retangulo_marca())):
+            if anterior != atual:
+                sujos += [r for r in (anterior, atual) if r]
+        if self.chave_hud() != self.hud_desenhado:
+            sujos.append(RET_HUD)
+        elif self.texto_tempo() != self.tempo_desenhado:
+            sujos.append(RET_TEMPO)
+        return sujos
+
+    # Compõe o quadro e devolve a lista de retângulos a enviar com pygame.display.update
+    # (vazia quando nada mudou).
     def draw(self, tela):
-        self.desenhar_background(tela)
         pos_mouse = pygame.mouse.get_pos()
-
+        quadro = (self.estado, self.camera.chave, id(self.grafo))
+        self.telas_usadas = []
+
+        if self.estado == ESTADO_JOGANDO and quadro == self.quadro_anterior and not self.redesenho_total:
+            sujos = self.regioes_sujas()
+            for regiao in sujos:
+                tela.set_clip(regiao)
+                self.compor_quadro(tela, pos_mouse)
+            tela.set_clip(None)
+        else:
+            # Fora da partida as telas vêm do cache; a chave de cada uma diz se algo mudou.
+            self.compor_quadro(tela, pos_mouse)
+            assinatura = (quadro, tuple(self.telas_usadas))
+            sujos = [tela.get_rect()] if self.redesenho_total or assinatura != self.quadro_assinatura else []
+            self.quadro_assinatura = assinatura
+            self.sujos = []
+
+        self.quadro_anterior = quadro
+        self.redesenho_total = False
+        if self.estado == ESTADO_JOGANDO:
+            self.hover_desenhado = self.retangulo_hover()
+            self.marca_desenhada = self.retangulo_marca()
+            self.hud_desenhado = self.chave_hud()
+            self.tempo_desenhado = self.texto_tempo()
+        return sujos
+
+    def compor_quadro(self, tela, pos_mouse):
         if self.estado == ESTADO_MENU:
             self.desenhar_menu(tela, pos_mouse)
             return
 
         if self.estado in [ESTADO_JOGANDO, ESTADO_INPUT_NOME, ESTADO_DERROTA]:
-            surface_glow = pygame.Surface((LARGURA, ALTURA), pygame.SRCALPHA)
-            for u, v in self.edges:
-                cor = C_VISITADO if (u.visitado and v.visitado) else C_EDGE
-                largura = 2 if (u.visitado and v.visitado) else 1
-                pygame.draw.line(tela, cor, (u.x, u.y), (v.x, v.y), largura)
-            for node in self.nodes.values():
-                node.desenhar(tela, surface_glow)
-            tela.blit(surface_glow, (0,0))
+            # A camada do grafo já traz o grid por baixo, então substitui o background.
+            # Ela só é recomposta quando a câmera se move ou o nível muda.
+            if self.chave_camada != (self.camera.chave, id(self.grafo)):
+                self.construir_camada_grafo()
+            tela.blit(self.camada_grafo, (0,0))
+            hover = self.retangulo_hover()
+            if hover:
+                tela.blit(self.atlas.item(self.no_hover, hover.center)[0], hover)
             if self.no_atual:
-                pygame.draw.circle(tela, C_ATUAL, (self.no_atual.x, self.no_atual.y), 6)
+                marca = self.retangulo_marca()
+                pygame.draw.circle(tela, C_ATUAL, marca.center, marca.width // 2 - 1)
             
             if self.estado == ESTADO_JOGANDO:
                 self.desenhar_hud(tela)
@@ -520,31 +828,120 @@ class GraphGame:
             self.desenhar_derrota(tela)
 
 
-game = GraphGame()
-clock = pygame.time.Clock()
-
-rodando = True
-while rodando:
-    tela.fill(C_BG_DARK)
-    game.update_hover(pygame.mouse.get_pos())
+# Métodos medidos pelo perfilador além das fases do laço principal.
+METODOS_PERFIL = (
+    "desenhar_menu", "desenhar_hud", "desenhar_input_nome", "desenhar_ranking", "desenhar_derrota",
+    "construir_camada_grafo", "desenhar_regiao_grafo",
+    "iniciar_nivel", "instalar_fase", "crescer",
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Neural Graph: Arcade Edition")
+    parser.add_argument("--perfil", metavar="ARQUIVO",
+                        help="grava o tempo de cada fase por frame em CSV (ou JSON Lines, se terminar em .jsonl)")
+    parser.add_argument("--semente", type=ler_semente, help="joga sempre a fase desta semente")
+    parser.add_argument("--placar", metavar="HOST[:PORTA]",
+                        help="também envia os recordes a um servidor_placar.py e mostra o ranking dele")
+    parser.add_argument("--replays", metavar="PASTA", help="grava o replay de cada partida terminada nesta pasta")
+    args = parser.parse_args()
+
+    pygame.init()
+    tela = pygame.display.set_mode((LARGURA, ALTURA))
+    pygame.display.set_caption("Neural Graph: Arcade Edition")
+    carregar_fontes()
+
+    game = GraphGame(recordes=ArmazemRecordes(ARQUIVO_RECORDES, ARQUIVO_RECORDES_LEGADO))
+    game.semente_fixa = args.semente
+    if args.replays:
+        os.makedirs(args.replays, exist_ok=True)
+        game.pasta_replays = args.replays
+    if args.placar:
+        host, _, porta = args.placar.partition(":")
+        game.placar = ClientePlacar(host or "127.0.0.1", int(porta or PORTA_PADRAO),
+                                    lambda resposta: pygame.event.post(pygame.event.Event(EVENTO_PLACAR)))
+    clock = pygame.time.Clock()
+
+    # F3 mostra o overlay; com --perfil as amostras também vão para o arquivo. Sem nenhum dos dois
+    # nada é instrumentado.
+    perfil = Perfilador(args.perfil)
+    perfil.instrumentar(game, METODOS_PERFIL)
+
+    rodando = True
+    dt = 0.0
+    espera = None
+    estado_anterior = None
+    while rodando:
+        # Sem nada mudando, dorme até o próximo evento (ou o próximo décimo do cronômetro).
+        eventos = []
+        if espera is not None:
+            with perfil.medir("espera"):
+                evento = pygame.event.wait(espera)
+            if evento.type != pygame.NOEVENT:
+                eventos.append(evento)
+
+        with perfil.medir("camera"):
+            movendo = game.atualizar_camera(pygame.key.get_pressed(), dt)
     
-    for evento in pygame.event.get():
-        if evento.type == pygame.QUIT:
-            rodando = False
-        
-        if evento.type == pygame.MOUSEBUTTONDOWN:
-            if evento.button == 1: 
-                game.processar_clique(pygame.mouse.get_pos())
-        
-        if evento.type == pygame.KEYDOWN:
-            if game.estado == ESTADO_INPUT_NOME:
-                game.processar_input_nome(evento)
-            elif evento.key == pygame.K_m:
-                 if game.estado in [ESTADO_RANKING, ESTADO_DERROTA]:
-                     game.estado = ESTADO_MENU
-
-    game.draw(tela)
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
\ No newline at end of file
+        with perfil.medir("eventos"):
+            eventos += pygame.event.get()
+            for evento in eventos:
+                if evento.type == pygame.QUIT:
+                    rodando = False
+
+                if evento.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE):
+                    game.forcar_redesenho()
+
+                if evento.type in (pygame.MOUSEMOTION, pygame.MOUSEWHEEL):
+                    game.processar_camera(evento)
+                    movendo = True
+            
+                if evento.type == pygame.MOUSEBUTTONDOWN:
+                    if evento.button == 1: 
+                        game.processar_clique(pygame.mouse.get_pos())
+            
+                if evento.type == pygame.KEYDOWN:
+                    if evento.key == pygame.K_F3:
+                        perfil.alternar_overlay()
+                        game.forcar_redesenho()
+                    elif game.estado == ESTADO_INPUT_NOME:
+                        game.processar_input_nome(evento)
+                    elif evento.key == pygame.K_m:
+                         if game.estado in [ESTADO_RANKING, ESTADO_DERROTA]:
+                             game.estado = ESTADO_MENU
+
+        # O nó sob o cursor só muda se o mouse ou a câmera se moverem (ou se uma fase começar).
+        if movendo or game.estado != estado_anterior:
+            with perfil.medir("update_hover"):
+                game.update_hover(pygame.mouse.get_pos())
+        estado_anterior = game.estado
+
+        with perfil.medir("draw"):
+            sujos = game.draw(tela)
+        if perfil.overlay:
+            with perfil.medir("perfil"):
+                perfil.desenhar(tela, fonte_mini)
+            sujos = [tela.get_rect()]
+        with perfil.medir("flip"):
+            if sujos:
+                pygame.display.update(sujos)
+        ocioso = not (eventos or sujos or movendo or perfil.overlay)
+        espera = game.tempo_ocioso() if ocioso else None
+        with perfil.medir("tick"):
+            # Limitado para uma espera longa não virar um salto da câmera no quadro seguinte.
+            dt = min(clock.tick(60), 50) / 1000
+        perfil.fim_frame()
+
+    perfil.fechar()
+    if game.reserva:
+        game.reserva.fechar()
+    if game.recordes:
+        game.recordes.fechar()
+    if game.placar:
+        game.placar.fechar()
+    if game.banco:
+        game.banco.fechar()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from nucleo_grafo import DIFICULDADES, gerar_grafo_semeado, percorrer
+
+# [BLOCO DA ANÁLISE DE DIFICULDADE (gera muitas fases por nível/modo e resume o que saiu)]
+# A fase k de uma rodada usa a semente base + k, a mesma que preparar_fase usaria: qualquer fase
+# estranha encontrada aqui pode ser aberta no jogo com --semente.
+# Cada lote devolve um Counter por métrica (valor -> quantas fases), então juntar lotes é só somar
+# contadores e milhões de fases não viram milhões de linhas em memória.
+
+METRICAS = ("nos", "arestas", "ciclos", "falhas_posicao", "gabarito", "divergencia_bfs_dfs", "prefixo_comum")
+PERCENTIS = (5, 50, 95)
+
+
+def medir_fase(config, modo, semente):
+    grafo = gerar_grafo_semeado(config, modo, semente)
+
+    # As duas ordens sobre o mesmo grafo: quanto mais cedo divergem, mais o modo muda a partida.
+    bfs, dfs = percorrer(grafo, "BFS"), percorrer(grafo, "DFS")
+    iguais = sum(a == b for a, b in zip(bfs, dfs))
+    prefixo = next((i for i, (a, b) in enumerate(zip(bfs, dfs)) if a != b), len(bfs))
+    return {
+        "nos": len(grafo),
+        "arestas": grafo.num_arestas,
+        "ciclos": grafo.num_arestas - len(grafo) + 1,
+        "falhas_posicao": grafo.falhas_posicao,
+        "gabarito": len(bfs if modo == "BFS" else dfs),
+        "divergencia_bfs_dfs": round(1 - iguais / max(1, len(bfs)), 2),
+        "prefixo_comum": prefixo,
+    }
+
+
+def analisar_lote(nome, modo, semente_inicial, quantidade):
+    config = DIFICULDADES[nome]
+    contagens = {metrica: Counter() for metrica in METRICAS}
+    for semente in range(semente_inicial, semente_inicial + quantidade):
+        for metrica, valor in medir_fase(config, modo, semente).items():
+            contagens[metrica][valor] += 1
+    return nome, modo, contagens
+
+
+def resumir(contagem):
+    total = sum(contagem.values())
+    media = sum(valor * n for valor, n in contagem.items()) / total
+    desvio = math.sqrt(sum(n * (valor - media) ** 2 for valor, n in contagem.items()) / total)
+    valores = sorted(contagem)
+    percentis = []
+    acumulado, i = 0, 0
+    for p in PERCENTIS:
+        while acumulado + contagem[valores[i]] < p / 100 * total:
+            acumulado += contagem[valores[i]]
+            i += 1
+        percentis.append(valores[i])
+    return [total, round(media, 4), round(desvio, 4), valores[0], *percentis, valores[-1]]
+
+
+def inteiro_positivo(texto):
+    valor = int(texto)
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"precisa ser maior que zero: {texto}")
+    return valor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distribuições do gerador de fases por nível e modo.")
+    parser.add_argument("--niveis", nargs="+", default=list(DIFICULDADES), choices=list(DIFICULDADES))
+    parser.add_argument("--modos", nargs="+", default=["BFS", "DFS"], choices=["BFS", "DFS"])
+    parser.add_argument("--fases", type=inteiro_positivo, default=10000, help="fases por nível e modo")
+    parser.add_argument("--semente-base", type=int, default=0)
+    parser.add_argument("--lote", type=inteiro_positivo, default=500, help="fases por tarefa enviada aos processos")
+    parser.add_argument("--processos", type=inteiro_positivo, default=os.cpu_count())
+    parser.add_argument("--saida", default="analise_dificuldade.csv")
+    parser.add_argument("--histogramas", metavar="ARQUIVO", help="também grava valor -> quantidade por métrica")
+    args = parser.parse_args(argv)
+
+    tarefas = [(nome, modo, args.semente_base + inicio, min(args.lote, args.fases - inicio))
+               for nome in args.niveis for modo in args.modos
+               for inicio in range(0, args.fases, args.lote)]
+    resultados = {(nome, modo): {metrica: Counter() for metrica in METRICAS}
+                  for nome in args.niveis for modo in args.modos}
+
+    comeco = time.perf_counter()
+    feitas = 0
+    total = len(args.niveis) * len(args.modos) * args.fases
+    with ProcessPoolExecutor(args.processos) as executor:
+        futuros = [executor.submit(analisar_lote, *tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            nome, modo, contagens = futuro.result()
+            for metrica, contagem in contagens.items():
+                resultados[(nome, modo)][metrica].update(contagem)
+            feitas += sum(contagens["nos"].values())
+            decorrido = time.perf_counter() - comeco
+            print(f"\r{feitas}/{total} fases  {feitas / decorrido:,.0f} fases/s", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+    with open(args.saida, "w", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["nivel", "modo", "metrica", "fases", "media", "desvio", "minimo",
+                           *(f"p{p}" for p in PERCENTIS), "maximo"])
+        for (nome, modo), contagens in resultados.items():
+            for metrica in METRICAS:
+                escritor.writerow([nome, modo, metrica, *resumir(contagens[metrica])])
+
+    if args.histogramas:
+        with open(args.histogramas, "w", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["nivel", "modo", "metrica", "valor", "fases"])
+            for (nome, modo), contagens in resultados.items():
+                for metrica in METRICAS:
+                    for valor, n in sorted(contagens[metrica].items()):
+                        escritor.writerow([nome, modo, metrica, valor, n])
+
+    print(f"{total} fases em {time.perf_counter() - comeco:.1f}s -> {args.saida}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
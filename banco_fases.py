@@ -0,0 +1,199 @@
+import argparse
+import datetime
+import mmap
+import os
+import struct
+import sys
+import warnings
+
+from nucleo_grafo import (
+    DIFICULDADES, CelulasCSR, FasePreparada, GradeEspacial, GrafoCompacto, gerador_da_config, preparar_fase,
+    semente_diaria,
+)
+
+# [BLOCO DO BANCO DE FASES (fases pré-geradas num arquivo binário lido via mmap)]
+# Layout (little-endian, tudo alinhado em 4 bytes):
+#   cabeçalho   MAGICO, versão, número de entradas
+#   índice      uma entrada de tamanho fixo por fase, ordenada por (dificuldade, modo, semente)
+#   dados       por fase: xs, ys, arestas (pares), início e adjacência do CSR e a grade espacial
+#               (nós e arestas por célula, também em CSR sobre uma tabela densa de células)
+# Os arrays da fase carregada são memoryviews sobre o mmap: nada é copiado nem regenerado e as
+# páginas são compartilhadas entre processos que abrem o mesmo arquivo.
+# A densidade de ciclos depende do modo, então a chave inclui o modo. A v2 não guarda mais o
+# gabarito: o jogo valida as jogadas pela fronteira da travessia. A v3 grava o gerador de cada fase;
+# uma fase de outro gerador que o da config atual é ignorada e gerada de novo. A v4 guarda a semente
+# em int64, a mesma largura do cabeçalho dos replays.
+
+ARQUIVO_BANCO_FASES = "banco_fases.bin"
+MAGICO = b"GRAFOBNK"
+VERSAO = 4
+MODOS = ("BFS", "DFS")
+SEMENTE_MIN, SEMENTE_MAX = -(1 << 63), (1 << 63) - 1
+
+CABECALHO = struct.Struct("<8sII")
+# dificuldade, modo, gerador, semente, offset, nós, arestas, largura, altura, tamanho da célula,
+# colunas e linhas da grade, itens de aresta na grade
+ENTRADA = struct.Struct("<16sBBxxqQIIIIIIII")
+
+
+# Tipo do argparse para sementes: fora de int64 não cabe no banco nem no replay da partida.
+def ler_semente(texto):
+    semente = int(texto)
+    if not SEMENTE_MIN <= semente <= SEMENTE_MAX:
+        raise argparse.ArgumentTypeError(f"a semente precisa caber em 64 bits com sinal: {texto}")
+    return semente
+
+
+def chave_entrada(dificuldade, modo, semente):
+    return (dificuldade.encode("utf-8").ljust(16, b"\0"), MODOS.index(modo), semente)
+
+
+def chave_indice(entrada):
+    nome, modo, _, semente = entrada[:4]
+    return (nome, modo, semente)
+
+
+def gravar_banco(caminho, fases):
+    entradas = []
+    blocos = []
+    offset = 0
+    for dificuldade, modo, fase in fases:
+        grafo = fase.grafo
+        if grafo.inicio is None:
+            grafo.compilar()
+        tamanho = fase.indice.tamanho
+        colunas, linhas = fase.largura_mundo // tamanho + 1, fase.altura_mundo // tamanho + 1
+        nos = CelulasCSR.de_dict(fase.indice.nos, colunas, linhas)
+        arestas = CelulasCSR.de_dict(fase.indice.arestas, colunas, linhas)
+        partes = (grafo.xs, grafo.ys, grafo.arestas, grafo.inicio, grafo.adj,
+                  nos.inicio, nos.valores, arestas.inicio, arestas.valores)
+        bloco = b"".join(bytes(memoryview(parte).cast("B")) for parte in partes)
+        entradas.append((chave_entrada(dificuldade, modo, fase.semente), fase.gerador, offset, len(grafo),
+                         grafo.num_arestas, fase.largura_mundo, fase.altura_mundo,
+                         tamanho, colunas, linhas, len(arestas.valores)))
+        blocos.append(bloco)
+        offset += len(bloco)
+
+    ordem = sorted(range(len(entradas)), key=lambda i: entradas[i][0])
+    inicio_dados = CABECALHO.size + ENTRADA.size * len(entradas)
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, len(entradas)))
+        for i in ordem:
+            (nome, modo, semente), gerador, off, *tamanhos = entradas[i]
+            f.write(ENTRADA.pack(nome, modo, gerador, semente, inicio_dados + off, *tamanhos))
+        for bloco in blocos:
+            f.write(bloco)
+    os.replace(temporario, caminho)
+
+
+class BancoFases:
+    def __init__(self, caminho):
+        self.dados = None
+        with open(caminho, "rb") as arquivo:  # o mmap continua válido depois de fechar o arquivo
+            self.mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mapa) < CABECALHO.size or CABECALHO.unpack_from(self.mapa, 0)[:2] != (MAGICO, VERSAO):
+            self.fechar()
+            raise ValueError(f"{caminho}: não é um banco de fases v{VERSAO}")
+        self.total = CABECALHO.unpack_from(self.mapa, 0)[2]
+        self.dados = memoryview(self.mapa)
+
+    def __len__(self):
+        return self.total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def entrada(self, i):
+        return ENTRADA.unpack_from(self.mapa, CABECALHO.size + i * ENTRADA.size)
+
+    # Busca binária direto no índice mapeado, sem carregá-lo para a memória.
+    def localizar(self, dificuldade, modo, semente):
+        alvo = chave_entrada(dificuldade, modo, semente)
+        baixo, alto = 0, self.total
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if chave_indice(self.entrada(meio)) < alvo:
+                baixo = meio + 1
+            else:
+                alto = meio
+        if baixo < self.total and chave_indice(self.entrada(baixo)) == alvo:
+            return self.entrada(baixo)
+        return None
+
+    def __contains__(self, chave):
+        return self.localizar(*chave) is not None
+
+    def buscar(self, dificuldade, modo, semente):
+        entrada = self.localizar(dificuldade, modo, semente)
+        if entrada is None:
+            return None
+        _, _, gerador, _, offset, n, m, largura, altura, tamanho, colunas, linhas, k = entrada
+        if gerador != gerador_da_config(DIFICULDADES[dificuldade]):
+            return None
+
+        def fatia(quantos):
+            nonlocal offset
+            vista = self.dados[offset:offset + 4 * quantos].cast("i")
+            offset += 4 * quantos
+            return vista
+
+        grafo = GrafoCompacto()
+        grafo.xs, grafo.ys = fatia(n), fatia(n)
+        grafo.arestas = fatia(2 * m)
+        grafo.inicio, grafo.adj = fatia(n + 1), fatia(2 * m)
+        grafo.flags = bytearray(n)
+        grafo._chaves_arestas = None
+        celulas = colunas * linhas
+        nos = CelulasCSR(colunas, linhas, fatia(celulas + 1), fatia(n))
+        arestas = CelulasCSR(colunas, linhas, fatia(celulas + 1), fatia(k))
+        indice = GradeEspacial.de_celulas(grafo, tamanho, nos, arestas)
+        return FasePreparada(largura, altura, grafo, indice, semente, gerador)
+
+    def fechar(self):
+        if self.dados is not None:
+            self.dados.release()
+            self.dados = None
+        try:
+            self.mapa.close()
+        except BufferError:  # ainda há fases usando o mapa; o sistema solta quando elas saírem
+            pass
+
+
+def abrir_banco(caminho=ARQUIVO_BANCO_FASES):
+    if not os.path.exists(caminho):
+        return None
+    # Banco de outra versão (ou estragado) não impede o jogo de abrir: as fases são geradas na hora.
+    try:
+        return BancoFases(caminho)
+    except (OSError, ValueError) as erro:
+        warnings.warn(f"Banco de fases ignorado: {erro}")
+        return None
+
+
+# Uso: python banco_fases.py banco_fases.bin --niveis Normal Pro --sementes 0 1000 --diarios 30
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-gera fases com semente num banco binário.")
+    parser.add_argument("saida", nargs="?", default=ARQUIVO_BANCO_FASES)
+    parser.add_argument("--niveis", nargs="+", default=list(DIFICULDADES), choices=list(DIFICULDADES))
+    parser.add_argument("--modos", nargs="+", default=list(MODOS), choices=MODOS)
+    parser.add_argument("--sementes", nargs=2, type=ler_semente, default=(0, 100), metavar=("INICIO", "FIM"))
+    parser.add_argument("--diarios", type=int, default=0, help="inclui as sementes diárias dos próximos N dias")
+    args = parser.parse_args(argv)
+
+    hoje = datetime.date.today()
+    sementes = list(range(*args.sementes))
+    sementes += [semente_diaria(hoje + datetime.timedelta(days=d)) for d in range(args.diarios)]
+
+    fases = ((nome, modo, preparar_fase(DIFICULDADES[nome], modo, semente))
+             for nome in args.niveis for modo in args.modos for semente in dict.fromkeys(sementes))
+    gravar_banco(args.saida, fases)
+    with BancoFases(args.saida) as banco:
+        print(f"{len(banco)} fases gravadas em {args.saida} ({os.path.getsize(args.saida) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from nucleo_grafo import (
+    DIFICULDADES, LARGURA, ALTURA, ESTADO_JOGANDO, ESTADO_INPUT_NOME, ESTADO_RANKING, ESTADO_DERROTA, ESTADO_MENU,
+    INFINITO, FaseInfinita, Fronteira, GradeEspacial, gerar_grafo_semeado, percorrer, preparar_fase,
+)
+from recordes import ArmazemRecordes
+
+# [BLOCO DO BENCHMARK (geração, resolvedor, hit-test e quadros, sempre com as mesmas sementes)]
+# Cada medida vira uma chave "nível/modo/medida" com as amostras em milissegundos de todas as
+# sementes e repetições. --saida grava a linha de base em JSON; --comparar roda de novo e aponta
+# toda medida cuja mediana piorou além da tolerância.
+# Os quadros são compostos do zero (caches de telas e de texto limpos antes de cada amostra),
+# senão a segunda repetição só mediria um blit da tela em cache.
+
+ARQUIVO_JOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AED-Grafo.py")
+CONSULTAS_HIT_TEST = 1000
+NOS_INFINITO = 5000  # o crescimento do modo infinito é medido com o grafo já deste tamanho
+TOLERANCIA = 0.10
+DIFERENCA_MINIMA_MS = 0.05  # abaixo disso a diferença é ruído do relógio, não regressão
+
+
+# O front end tem hífen no nome, então não dá para importá-lo com import.
+def carregar_jogo():
+    spec = importlib.util.spec_from_file_location("aed_grafo", ARQUIVO_JOGO)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    amostras = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return amostras
+
+
+# Uma partida inteira do ponto de vista da validação: cada jogada conferida e visitada na fronteira.
+def jogar_fronteira(grafo, modo, ordem):
+    grafo.resetar_estado()
+    fronteira = Fronteira(grafo, modo)
+    fronteira.visitar(0)
+    for id in ordem:
+        fronteira.aceita(id)
+        fronteira.visitar(id)
+
+
+def medir_nucleo(config, modo, semente, repeticoes):
+    grafo = gerar_grafo_semeado(config, modo, semente)
+    ordem = percorrer(grafo, modo)
+    return {
+        "geracao": cronometrar(lambda: gerar_grafo_semeado(config, modo, semente), repeticoes),
+        "indexacao": cronometrar(lambda: GradeEspacial(grafo), repeticoes),
+        "resolvedor": cronometrar(lambda: percorrer(grafo, modo), repeticoes),
+        "fronteira": cronometrar(lambda: jogar_fronteira(grafo, modo, ordem), repeticoes),
+    }
+
+
+# Uma camada nova deve custar o mesmo com 50 ou com milhares de nós.
+def medir_infinito(modo, semente, repeticoes):
+    fase = FaseInfinita(modo, semente)
+    inicial = cronometrar(fase.crescer, repeticoes)
+    while len(fase.grafo) < NOS_INFINITO:
+        fase.crescer()
+    return {"camada_inicio": inicial, f"camada_{NOS_INFINITO}_nos": cronometrar(fase.crescer, repeticoes)}
+
+
+def medir_front_end(game, modulo, tela, nome, modo, semente, repeticoes):
+    game.modo = modo
+    game.dificuldade_atual = nome
+    game.instalar_fase(preparar_fase(DIFICULDADES[nome], modo, semente))
+    game.estado = ESTADO_JOGANDO
+    game.start_ticks = game.relogio()
+    game.forcar_redesenho()
+    game.draw(tela)
+
+    # Metade das consultas perto de nós visíveis (acerta) e metade em pontos quaisquer da tela.
+    rng = random.Random(semente)
+    visiveis = [id for id in range(len(game.grafo)) if tela.get_rect().collidepoint(game.posicao_tela(id))]
+    pontos = []
+    for i in range(CONSULTAS_HIT_TEST):
+        if i % 2 and visiveis:
+            x, y = game.posicao_tela(rng.choice(visiveis))
+            pontos.append((int(x) + rng.randint(-20, 20), int(y) + rng.randint(-20, 20)))
+        else:
+            pontos.append((rng.randrange(LARGURA), rng.randrange(ALTURA)))
+
+    def hit_test():
+        for ponto in pontos:
+            game.update_hover(ponto)
+
+    def limpar_caches():
+        game.telas_cache.clear()
+        modulo.render_texto.cache_clear()
+        game.cronometro = (None, None)
+        game.forcar_redesenho()
+
+    def reconstruir_camada():
+        game.chave_camada = None
+        game.forcar_redesenho()
+
+    # O hover alterna entre dois nós para o quadro parcial sempre ter o que redesenhar.
+    alvos = [game.posicao_tela(id) for id in visiveis[1:3]] or [(0, 0)]
+    vez = [0]
+
+    def trocar_hover():
+        vez[0] += 1
+        game.update_hover(alvos[vez[0] % len(alvos)])
+
+    medidas = {
+        f"hit_test_{CONSULTAS_HIT_TEST}": cronometrar(hit_test, repeticoes),
+        "quadro_completo": cronometrar(lambda: game.draw(tela), repeticoes, game.forcar_redesenho),
+        "quadro_camada": cronometrar(lambda: game.draw(tela), repeticoes, reconstruir_camada),
+        "quadro_hover": cronometrar(lambda: game.draw(tela), repeticoes, trocar_hover),
+    }
+    game.pontuacao_final = 4321
+    for estado, chave in ((ESTADO_INPUT_NOME, "quadro_input_nome"), (ESTADO_DERROTA, "quadro_derrota"),
+                          (ESTADO_RANKING, "quadro_ranking"), (ESTADO_MENU, "quadro_menu")):
+        game.estado = estado
+        medidas[chave] = cronometrar(lambda: game.draw(tela), repeticoes, limpar_caches)
+    return medidas
+
+
+def resumir(amostras):
+    return {
+        "mediana_ms": round(statistics.median(amostras), 4),
+        "minimo_ms": round(min(amostras), 4),
+        "maximo_ms": round(max(amostras), 4),
+        "amostras": len(amostras),
+    }
+
+
+def rodar(args):
+    modulo = carregar_jogo()
+    pygame.init()
+    tela = pygame.display.set_mode((LARGURA, ALTURA))
+    modulo.carregar_fontes()
+
+    # Placar descartável e sem pré-geração em segundo plano: nada disputa CPU com as medidas.
+    pasta = tempfile.TemporaryDirectory()
+    game = modulo.GraphGame(pre_gerar=False, recordes=ArmazemRecordes(os.path.join(pasta.name, "recordes.db")))
+    if game.banco:
+        game.banco.fechar()
+        game.banco = None
+
+    amostras = {}
+    sementes = range(args.semente_base, args.semente_base + args.sementes)
+    try:
+        for nome in args.niveis:
+            for modo in args.modos:
+                comeco = time.perf_counter()
+                for semente in sementes:
+                    if nome == INFINITO:
+                        medidas = medir_infinito(modo, semente, args.repeticoes)
+                    else:
+                        medidas = medir_nucleo(DIFICULDADES[nome], modo, semente, args.repeticoes)
+                        medidas.update(medir_front_end(game, modulo, tela, nome, modo, semente, args.repeticoes))
+                    for medida, valores in medidas.items():
+                        amostras.setdefault(f"{nome}/{modo}/{medida}", []).extend(valores)
+                print(f"{nome}/{modo}: {time.perf_counter() - comeco:.1f}s", file=sys.stderr)
+    finally:
+        game.recordes.fechar()
+        pasta.cleanup()
+        pygame.quit()
+
+    return {
+        "ambiente": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+        },
+        "parametros": {"sementes": list(sementes), "repeticoes": args.repeticoes},
+        "medidas": {chave: resumir(valores) for chave, valores in amostras.items()},
+    }
+
+
+# Devolve as chaves que pioraram além da tolerância (e não só por ruído do relógio).
+def comparar(base, atual, tolerancia):
+    regressoes = []
+    print(f"{'medida':<40}{'base':>11}{'atual':>11}{'variação':>10}")
+    for chave, medida in atual["medidas"].items():
+        anterior = base["medidas"].get(chave)
+        if anterior is None:
+            print(f"{chave:<40}{'-':>11}{medida['mediana_ms']:>11.3f}{'nova':>10}")
+            continue
+        antes, agora = anterior["mediana_ms"], medida["mediana_ms"]
+        variacao = (agora - antes) / antes if antes else 0.0
+        marca = ""
+        if variacao > tolerancia and agora - antes > DIFERENCA_MINIMA_MS:
+            regressoes.append(chave)
+            marca = "  REGRESSÃO"
+        print(f"{chave:<40}{antes:>11.3f}{agora:>11.3f}{variacao:>+10.1%}{marca}")
+    if base.get("ambiente") != atual.get("ambiente"):
+        print("aviso: a linha de base foi medida em outro ambiente", file=sys.stderr)
+    return regressoes
+
+
+# Uso: python bench_grafo.py --saida base.json
+#      python bench_grafo.py --comparar base.json --niveis Normal Mega
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless de geração, resolvedor, hit-test e quadros.")
+    parser.add_argument("--niveis", nargs="+", default=[*DIFICULDADES, INFINITO], choices=[*DIFICULDADES, INFINITO])
+    parser.add_argument("--modos", nargs="+", default=["BFS", "DFS"], choices=["BFS", "DFS"])
+    parser.add_argument("--sementes", type=int, default=3, help="quantas sementes por nível e modo")
+    parser.add_argument("--semente-base", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=5, help="amostras por semente e medida")
+    parser.add_argument("--saida", help="grava o resultado (linha de base) neste JSON")
+    parser.add_argument("--comparar", metavar="BASE", help="compara com uma linha de base gravada antes")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="piora relativa da mediana que conta como regressão (padrão: 0.10)")
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, 'r') as f:
+            base = json.load(f)
+
+    resultado = rodar(args)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultado, f, indent=1, ensure_ascii=False)
+
+    if base is None:
+        for chave, medida in resultado["medidas"].items():
+            print(f"{chave:<40}{medida['mediana_ms']:>11.3f} ms")
+        return 0
+    regressoes = comparar(base, resultado, args.tolerancia)
+    print(f"{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import glob
+import json
+import os
+import sys
+
+import pygame
+
+# [BLOCO DAS FONTES (resolução com cache em disco e carregamento no primeiro uso)]
+# pygame.font.SysFont varre todas as fontes do sistema (fc-list no Linux, registro no Windows)
+# a cada primeira chamada do processo. Aqui a varredura acontece uma vez: o caminho escolhido
+# vai para um arquivo pequeno, chaveado pelo estado das pastas de fontes (e pela lista de
+# preferência), e só é refeita quando alguma fonte é instalada ou removida.
+# Sem nenhuma fonte da lista no sistema, usa um .ttf da pasta fontes/ ao lado do jogo; sem ela,
+# a fonte padrão do pygame (o mesmo que SysFont faria). GRAFO_FONTE força um arquivo específico.
+
+FONTES_PREFERIDAS = ['Segoe UI', 'Roboto', 'Helvetica', 'Arial']
+ARQUIVO_CACHE_FONTES = "cache_fontes.json"
+PASTA_FONTES_EMBUTIDAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fontes")
+VARIAVEL_FONTE = "GRAFO_FONTE"
+
+
+def pastas_fontes_sistema():
+    if sys.platform == "win32":
+        pastas = [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+                  os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")]
+    elif sys.platform == "darwin":
+        pastas = ["/System/Library/Fonts", "/Library/Fonts", os.path.expanduser("~/Library/Fonts")]
+    else:
+        pastas = ["/usr/share/fonts", "/usr/local/share/fonts",
+                  os.path.expanduser("~/.fonts"), os.path.expanduser("~/.local/share/fonts")]
+    return pastas
+
+
+# Instalar ou remover uma fonte muda o mtime da pasta onde ela está; no Linux elas ficam um nível
+# abaixo (ex.: /usr/share/fonts/truetype), então as subpastas diretas também entram na chave.
+def assinatura_fontes():
+    pastas = []
+    for pasta in pastas_fontes_sistema():
+        try:
+            pastas.append([pasta, os.stat(pasta).st_mtime_ns])
+            with os.scandir(pasta) as itens:
+                pastas.extend([item.path, item.stat().st_mtime_ns]
+                              for item in itens if item.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+    return {"preferidas": FONTES_PREFERIDAS, "pastas": sorted(pastas)}
+
+
+# (caminho, negrito sintético) de um .ttf/.otf embutido; None cai na fonte padrão do pygame.
+def fonte_embutida(negrito):
+    arquivos = sorted(glob.glob(os.path.join(PASTA_FONTES_EMBUTIDAS, "*.[to]tf")))
+    regulares = [a for a in arquivos if "bold" not in os.path.basename(a).lower()]
+    if negrito:
+        negritos = [a for a in arquivos if "bold" in os.path.basename(a).lower()]
+        if negritos:
+            return negritos[0], False
+    if regulares or arquivos:
+        return (regulares or arquivos)[0], negrito
+    return None, negrito
+
+
+def varrer_fontes():
+    regular = pygame.font.match_font(FONTES_PREFERIDAS)
+    negrito = pygame.font.match_font(FONTES_PREFERIDAS, bold=True)
+    fontes = {}
+    fontes["regular"] = [regular, False] if regular else list(fonte_embutida(False))
+    if negrito:
+        # match_font devolve o arquivo normal quando a família não tem negrito; aí o SysFont
+        # engrossaria na renderização, e o mesmo é feito aqui.
+        fontes["negrito"] = [negrito, negrito == regular]
+    else:
+        fontes["negrito"] = list(fonte_embutida(True))
+    return fontes
+
+
+class ResolvedorFontes:
+    def __init__(self, arquivo_cache=ARQUIVO_CACHE_FONTES):
+        self.arquivo_cache = arquivo_cache
+        self.fontes = None
+
+    def resolver(self):
+        forcada = os.environ.get(VARIAVEL_FONTE)
+        if forcada:
+            return {"regular": [forcada, False], "negrito": [forcada, True]}
+
+        assinatura = assinatura_fontes()
+        try:
+            with open(self.arquivo_cache, 'r') as f:
+                cache = json.load(f)
+            caminhos = [caminho for caminho, _ in cache["fontes"].values() if caminho]
+            if cache["assinatura"] == assinatura and all(os.path.exists(c) for c in caminhos):
+                return cache["fontes"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+        fontes = varrer_fontes()
+        try:
+            with open(self.arquivo_cache, 'w') as f:
+                json.dump({"assinatura": assinatura, "fontes": fontes}, f)
+        except OSError:
+            pass
+        return fontes
+
+    def caminho(self, negrito):
+        if self.fontes is None:
+            self.fontes = self.resolver()
+        return self.fontes["negrito" if negrito else "regular"]
+
+    def fonte(self, tamanho, negrito=False):
+        caminho, sintetico = self.caminho(negrito)
+        try:
+            fonte = pygame.font.Font(caminho, tamanho)
+        except OSError:
+            fonte = pygame.font.Font(None, tamanho)
+            sintetico = negrito
+        if sintetico:
+            fonte.set_bold(True)
+        return fonte
+
+
+# Fica no lugar da pygame.font.Font e só abre o arquivo quando alguém desenha ou mede texto.
+# É hashável por identidade, então serve de chave para os caches de texto renderizado.
+class FontePreguicosa:
+    def __init__(self, resolvedor, tamanho, negrito=False):
+        self.resolvedor = resolvedor
+        self.tamanho = tamanho
+        self.negrito = negrito
+        self._fonte = None
+
+    def __getattr__(self, nome):
+        if self._fonte is None:
+            self._fonte = self.resolvedor.fonte(self.tamanho, self.negrito)
+        return getattr(self._fonte, nome)
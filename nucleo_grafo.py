@@ -0,0 +1,1013 @@
+import math
+import random
+import os
+import time
+import hashlib
+import datetime
+import warnings
+from array import array
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Mapping
+
+# numpy é opcional, mas os níveis gigantes (gerador vetorizado) não abrem sem ele. Só é importado
+# quando um grafo grande precisa dele: importar o núcleo continua instantâneo. O mesmo vale para
+# os processos da ReservaFases.
+np = None
+_numpy_procurado = False
+
+def carregar_numpy():
+    global np, _numpy_procurado
+    if not _numpy_procurado:
+        _numpy_procurado = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+# Núcleo do jogo: geração de fases, validação das jogadas e pontuação, sem depender de janela ou fontes.
+# Pode ser importado por ferramentas em lote; o front end (AED-Grafo.py) herda de NucleoJogo.
+
+LARGURA, ALTURA = 1000, 700
+
+MARGEM_X, MARGEM_Y = 80, 120
+RAIO_MIN = 55
+JITTER_X, JITTER_Y = 40, 25
+TENTATIVAS_POSICAO = 15
+DISTANCIA_CICLO = 300
+
+
+# [BALANCEAMENTO DE DIFICULDADE]
+# Níveis com "largura_mundo"/"altura_camada" não cabem numa tela e usam o gerador vetorizado (numpy).
+# Qual gerador monta a fase depende só da config: a mesma semente tem que dar a mesma fase em
+# qualquer máquina, e o gerador usado vai nos cabeçalhos do banco de fases e dos replays.
+GERADORES = ("clássico", "vetorizado", "infinito")
+GERADOR_CLASSICO, GERADOR_VETORIZADO, GERADOR_INFINITO = range(len(GERADORES))
+DIFICULDADES = {
+    "Noob":   {"camadas": 2, "ciclos": 0.0, "min_nos": 1, "max_nos": 2},
+    "Fácil":  {"camadas": 3, "ciclos": 0.1, "min_nos": 2, "max_nos": 3},
+    "Normal": {"camadas": 4, "ciclos": 0.3, "min_nos": 2, "max_nos": 4},
+    "Pro":    {"camadas": 5, "ciclos": 0.5, "min_nos": 3, "max_nos": 5},
+    "Hacker": {"camadas": 7, "ciclos": 0.8, "min_nos": 6, "max_nos": 8},
+    "Mega":   {"camadas": 12, "ciclos": 0.8, "min_nos": 20, "max_nos": 30, "largura_mundo": 3200, "altura_camada": 110},
+    "Giga":   {"camadas": 40, "ciclos": 0.8, "min_nos": 60, "max_nos": 80, "largura_mundo": 8200, "altura_camada": 110},
+    "Tera":   {"camadas": 100, "ciclos": 0.8, "min_nos": 200, "max_nos": 260, "largura_mundo": 26200, "altura_camada": 110},
+}
+
+def dimensoes_mundo(config):
+    largura = config.get("largura_mundo", LARGURA)
+    if "altura_camada" in config:
+        return largura, MARGEM_Y + config["camadas"] * config["altura_camada"] + 80
+    return largura, ALTURA
+
+ESTADO_MENU = 0
+ESTADO_JOGANDO = 1
+ESTADO_INPUT_NOME = 2
+ESTADO_RANKING = 3
+ESTADO_DERROTA = 4
+
+# [BLOCO DO GRAFO COMPACTO (ids inteiros, coordenadas em arrays paralelos e adjacência CSR)]
+
+VISITADO = 1
+NA_FILA = 2
+HOVER = 4
+
+class GrafoCompacto:
+    def __init__(self):
+        self.xs = array('i')
+        self.ys = array('i')
+        self.flags = bytearray()
+        self.arestas = array('i')  # pares (u, v) intercalados, na ordem em que foram criados
+        self._chaves_arestas = set()
+        self.inicio = None  # CSR: vizinhos de u ficam em adj[inicio[u]:inicio[u + 1]]
+        self.adj = None
+        self.falhas_posicao = 0  # nós que esgotaram TENTATIVAS_POSICAO e ficaram no centro do setor
+
+    # Monta o grafo de uma vez a partir de buffers numpy (coordenadas e pares de arestas já sem duplicatas).
+    @classmethod
+    def de_arrays(cls, xs, ys, pares):
+        grafo = cls()
+        grafo.xs = array('i', xs.astype(np.int32).tobytes())
+        grafo.ys = array('i', ys.astype(np.int32).tobytes())
+        grafo.flags = bytearray(len(grafo.xs))
+        grafo.arestas = array('i', pares.astype(np.int32).tobytes())
+        grafo._chaves_arestas = None
+        return grafo
+
+    def __len__(self):
+        return len(self.xs)
+
+    @property
+    def num_arestas(self):
+        return len(self.arestas) // 2
+
+    def add_node(self, x, y):
+        self.xs.append(x)
+        self.ys.append(y)
+        self.flags.append(0)
+        self.inicio = None
+        return len(self.xs) - 1
+
+    # O conjunto de chaves só é montado quando alguém consulta uma aresta (os níveis em lote não precisam).
+    @property
+    def chaves_arestas(self):
+        if self._chaves_arestas is None:
+            arestas = self.arestas
+            self._chaves_arestas = {self.chave_aresta(arestas[k], arestas[k + 1]) for k in range(0, len(arestas), 2)}
+        return self._chaves_arestas
+
+    def chave_aresta(self, u, v):
+        return (u << 32) | v if u < v else (v << 32) | u
+
+    # Com o CSR montado (linhas ordenadas), uma busca binária na linha de u dispensa o conjunto de chaves.
+    def tem_aresta(self, u, v):
+        if self.inicio is None:
+            return self.chave_aresta(u, v) in self.chaves_arestas
+        fim = self.inicio[u + 1]
+        i = bisect_left(self.adj, v, self.inicio[u], fim)
+        return i < fim and self.adj[i] == v
+
+    def add_edge(self, u, v):
+        chave = self.chave_aresta(u, v)
+        if chave in self.chaves_arestas:
+            return False
+        self.chaves_arestas.add(chave)
+        self.arestas.append(u)
+        self.arestas.append(v)
+        self.inicio = None
+        return True
+
+    # Monta o CSR a partir da lista de arestas, já com cada linha ordenada por id (ordem que o solver usa).
+    # Só roda quando o grafo mudou desde a última consulta.
+    def compilar(self):
+        if len(self.arestas) > 4096 and carregar_numpy() is not None:
+            return self.compilar_vetorizado()
+        n = len(self.xs)
+        grau = [0] * (n + 1)
+        arestas = self.arestas
+        for k in range(0, len(arestas), 2):
+            grau[arestas[k] + 1] += 1
+            grau[arestas[k + 1] + 1] += 1
+        for u in range(n):
+            grau[u + 1] += grau[u]
+
+        inicio = array('i', grau)
+        adj = array('i', bytes(4 * len(arestas)))
+        proximo = grau[:n]
+        for k in range(0, len(arestas), 2):
+            u, v = arestas[k], arestas[k + 1]
+            adj[proximo[u]] = v
+            proximo[u] += 1
+            adj[proximo[v]] = u
+            proximo[v] += 1
+        for u in range(n):
+            a, b = inicio[u], inicio[u + 1]
+            if b - a > 1:
+                adj[a:b] = array('i', sorted(adj[a:b]))
+        self.inicio, self.adj = inicio, adj
+
+    # Acrescenta nós e arestas mantendo o CSR válido: só as linhas a partir do menor nó tocado por
+    # uma aresta nova são refeitas (no modo infinito, a última camada e a nova).
+    def anexar(self, xs, ys, pares):
+        if self.inicio is None:
+            self.compilar()
+        n_antigo = len(self.xs)
+        a_partir = min(min(pares, default=n_antigo), n_antigo)
+        self.xs.extend(xs)
+        self.ys.extend(ys)
+        self.flags.extend(bytes(len(xs)))
+
+        novos = {}
+        for k in range(0, len(pares), 2):
+            u, v = pares[k], pares[k + 1]
+            if self._chaves_arestas is not None:
+                self._chaves_arestas.add(self.chave_aresta(u, v))
+            self.arestas.append(u)
+            self.arestas.append(v)
+            novos.setdefault(u, []).append(v)
+            novos.setdefault(v, []).append(u)
+
+        inicio, adj = self.inicio, self.adj
+        linhas = [sorted([*adj[inicio[u]:inicio[u + 1]], *novos.get(u, ())]) if u < n_antigo
+                  else sorted(novos.get(u, ())) for u in range(a_partir, len(self.xs))]
+        del adj[inicio[a_partir]:]
+        del inicio[a_partir + 1:]
+        for linha in linhas:
+            adj.extend(linha)
+            inicio.append(len(adj))
+
+    def compilar_vetorizado(self):
+        pares = np.frombuffer(self.arestas, dtype=np.int32).reshape(-1, 2)
+        origem = np.concatenate((pares[:, 0], pares[:, 1]))
+        destino = np.concatenate((pares[:, 1], pares[:, 0]))
+        ordem = np.lexsort((destino, origem))
+        inicio = np.zeros(len(self.xs) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(origem, minlength=len(self.xs)), out=inicio[1:])
+        self.inicio = array('i', inicio.tobytes())
+        self.adj = array('i', destino[ordem].astype(np.int32).tobytes())
+
+    def vizinhos(self, u):
+        if self.inicio is None:
+            self.compilar()
+        return self.adj[self.inicio[u]:self.inicio[u + 1]]
+
+    def tem_flag(self, u, flag):
+        return bool(self.flags[u] & flag)
+
+    def marcar(self, u, flag, valor=True):
+        if valor:
+            self.flags[u] |= flag
+        else:
+            self.flags[u] &= ~flag
+
+    def resetar_estado(self):
+        self.flags = bytearray(len(self.xs))
+
+# [BLOCO DO ÍNDICE ESPACIAL (grade uniforme: quais nós e arestas caem numa área do mundo)]
+
+class GradeEspacial:
+    def __init__(self, grafo, tamanho=256):
+        self.grafo = grafo
+        self.tamanho = tamanho
+        self.nos = {}
+        self.arestas = {}
+        if len(grafo) > 1024 and carregar_numpy() is not None:
+            self.indexar_vetorizado(grafo)
+            return
+
+        for id, (x, y) in enumerate(zip(grafo.xs, grafo.ys)):
+            self.nos.setdefault((x // tamanho, y // tamanho), []).append(id)
+
+        for a in range(grafo.num_arestas):
+            self.inserir_aresta(a)
+
+    def indexar_vetorizado(self, grafo):
+        t = self.tamanho
+        xs = np.frombuffer(grafo.xs, dtype=np.int32)
+        ys = np.frombuffer(grafo.ys, dtype=np.int32)
+        self.nos = _agrupar_por_celula(xs // t, ys // t, np.arange(len(xs)))
+
+        pares = np.frombuffer(grafo.arestas, dtype=np.int32).reshape(-1, 2)
+        ex, ey = xs[pares], ys[pares]
+        cx0, cx1 = ex.min(axis=1) // t, ex.max(axis=1) // t
+        cy0, cy1 = ey.min(axis=1) // t, ey.max(axis=1) // t
+        colunas = cx1 - cx0 + 1
+        total = colunas * (cy1 - cy0 + 1)
+        arestas = np.repeat(np.arange(len(pares)), total)
+        deslocamento = np.arange(len(arestas)) - np.repeat(np.cumsum(total) - total, total)
+        colunas = np.repeat(colunas, total)
+        self.arestas = _agrupar_por_celula(cx0[arestas] + deslocamento % colunas,
+                                           cy0[arestas] + deslocamento // colunas, arestas)
+
+    # Índice já pronto (ex.: lido do banco de fases); `nos` e `arestas` só precisam de .get(celula, padrão).
+    @classmethod
+    def de_celulas(cls, grafo, tamanho, nos, arestas):
+        indice = cls.__new__(cls)
+        indice.grafo = grafo
+        indice.tamanho = tamanho
+        indice.nos = nos
+        indice.arestas = arestas
+        return indice
+
+    def celulas(self, x0, y0, x1, y1):
+        t = self.tamanho
+        for cx in range(int(x0) // t, int(x1) // t + 1):
+            for cy in range(int(y0) // t, int(y1) // t + 1):
+                yield (cx, cy)
+
+    # Os resultados são por célula: podem incluir itens um pouco fora do retângulo pedido.
+    def nos_em(self, x0, y0, x1, y1):
+        ids = []
+        for celula in self.celulas(x0, y0, x1, y1):
+            ids.extend(self.nos.get(celula, ()))
+        return ids
+
+    def arestas_em(self, x0, y0, x1, y1):
+        indices = set()
+        for celula in self.celulas(x0, y0, x1, y1):
+            indices.update(self.arestas.get(celula, ()))
+        return indices
+
+    # Para quem monta o grafo aos poucos (o gerador clássico indexa cada nó assim que o posiciona).
+    def inserir_no(self, id, x, y):
+        self.nos.setdefault((x // self.tamanho, y // self.tamanho), []).append(id)
+
+    # Cada aresta entra em todas as células cobertas pelo seu retângulo envolvente.
+    def inserir_aresta(self, a):
+        xs, ys, arestas, t = self.grafo.xs, self.grafo.ys, self.grafo.arestas, self.tamanho
+        u, v = arestas[2 * a], arestas[2 * a + 1]
+        for cx in range(min(xs[u], xs[v]) // t, max(xs[u], xs[v]) // t + 1):
+            for cy in range(min(ys[u], ys[v]) // t, max(ys[u], ys[v]) // t + 1):
+                self.arestas.setdefault((cx, cy), []).append(a)
+
+    # Menor id a menos de `raio` do ponto: a mesma resposta da varredura linear em ordem de id.
+    def no_em(self, x, y, raio):
+        xs, ys = self.grafo.xs, self.grafo.ys
+        achado = None
+        for id in self.nos_em(x - raio, y - raio, x + raio, y + raio):
+            if (achado is None or id < achado) and math.hypot(x - xs[id], y - ys[id]) < raio:
+                achado = id
+        return achado
+
+    def tem_no_perto(self, x, y, raio):
+        xs, ys = self.grafo.xs, self.grafo.ys
+        return any(math.hypot(x - xs[id], y - ys[id]) < raio
+                   for id in self.nos_em(x - raio, y - raio, x + raio, y + raio))
+
+# Células numa tabela densa colunas x linhas em formato CSR (início por célula + valores), para
+# índices guardados em disco; responde .get como o dicionário que substitui.
+class CelulasCSR:
+    __slots__ = ("colunas", "linhas", "inicio", "valores")
+
+    def __init__(self, colunas, linhas, inicio, valores):
+        self.colunas = colunas
+        self.linhas = linhas
+        self.inicio = inicio
+        self.valores = valores
+
+    @classmethod
+    def de_dict(cls, celulas, colunas, linhas):
+        inicio = array('i', [0])
+        valores = array('i')
+        for cy in range(linhas):
+            for cx in range(colunas):
+                valores.extend(celulas.get((cx, cy), ()))
+                inicio.append(len(valores))
+        return cls(colunas, linhas, inicio, valores)
+
+    def get(self, celula, padrao=None):
+        cx, cy = celula
+        if 0 <= cx < self.colunas and 0 <= cy < self.linhas:
+            i = cy * self.colunas + cx
+            a, b = self.inicio[i], self.inicio[i + 1]
+            if b > a:
+                return self.valores[a:b]
+        return padrao
+
+def _agrupar_por_celula(cx, cy, valores):
+    chaves = (cx.astype(np.int64) << 32) | (cy.astype(np.int64) & 0xFFFFFFFF)
+    ordem = np.argsort(chaves, kind="stable")
+    chaves, valores = chaves[ordem], valores[ordem]
+    cortes = np.flatnonzero(np.diff(chaves)) + 1
+    inicios = np.concatenate(([0], cortes)).tolist()
+    grupos = np.split(valores, cortes)
+    return {(int(chaves[i] >> 32), int(chaves[i] & 0xFFFFFFFF)): grupo.tolist()
+            for i, grupo in zip(inicios, grupos)}
+
+# [BLOCO DA CLASSE NODE (visão leve sobre um id do GrafoCompacto: se já foi visitado, se o mouse está em cima, etc).]
+
+def _propriedade_flag(flag):
+    return property(lambda self: self.grafo.tem_flag(self.id, flag),
+                    lambda self, valor: self.grafo.marcar(self.id, flag, valor))
+
+class Node:
+    __slots__ = ("grafo", "id")
+
+    def __init__(self, grafo, id):
+        self.grafo = grafo
+        self.id = id
+
+    x = property(lambda self: self.grafo.xs[self.id])
+    y = property(lambda self: self.grafo.ys[self.id])
+    visitado = _propriedade_flag(VISITADO)
+    na_fila = _propriedade_flag(NA_FILA)
+    hover = _propriedade_flag(HOVER)
+
+    @property
+    def vizinhos(self):
+        return [Node(self.grafo, v) for v in self.grafo.vizinhos(self.id)]
+
+    def __eq__(self, outro):
+        return isinstance(outro, Node) and outro.grafo is self.grafo and outro.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+# self.nodes continua sendo "id -> Node", mas os nós são criados sob demanda a partir do grafo.
+class VistaNos(Mapping):
+    def __init__(self, grafo):
+        self.grafo = grafo
+
+    def __getitem__(self, id):
+        if not 0 <= id < len(self.grafo):
+            raise KeyError(id)
+        return Node(self.grafo, id)
+
+    def __iter__(self):
+        return iter(range(len(self.grafo)))
+
+    def __len__(self):
+        return len(self.grafo)
+
+# [BLOCO DO SOLVER (uma ordem BFS/DFS canônica, com os vizinhos por id; usado pelas ferramentas em lote)]
+
+def percorrer(grafo, modo):
+    if grafo.inicio is None:
+        grafo.compilar()
+    inicio, adj = grafo.inicio, grafo.adj
+    visitados = bytearray(len(grafo))
+    gabarito = array('i')
+
+    if modo == "BFS":
+        fila = deque([0])
+        visitados[0] = 1
+        while fila:
+            atual = fila.popleft()
+            if atual != 0: gabarito.append(atual)
+            for vizinho in adj[inicio[atual]:inicio[atual + 1]]:
+                if not visitados[vizinho]:
+                    visitados[vizinho] = 1
+                    fila.append(vizinho)
+
+    elif modo == "DFS":
+        pilha = [0]
+        while pilha:
+            atual = pilha.pop()
+            if not visitados[atual]:
+                visitados[atual] = 1
+                if atual != 0: gabarito.append(atual)
+                for vizinho in reversed(adj[inicio[atual]:inicio[atual + 1]]):
+                    if not visitados[vizinho]:
+                        pilha.append(vizinho)
+    return gabarito
+
+# [BLOCO DA FRONTEIRA (aceita qualquer ordem BFS/DFS legal, sem gabarito pré-calculado)]
+
+# Uma jogada é legal se o nó clicado é vizinho não visitado do nó que a travessia está expandindo:
+# no BFS, o primeiro visitado (na ordem de visita) que ainda tem vizinhos por visitar; no DFS, o mais
+# fundo do caminho atual nessa situação. Cada nó visitado guarda quantos vizinhos ainda faltam, então
+# visitar custa O(grau) e a cabeça (BFS) e a pilha (DFS) só andam para a frente.
+# NA_FILA marca os nós descobertos: ainda não visitados, mas vizinhos de algum visitado.
+class Fronteira:
+    def __init__(self, grafo, modo):
+        self.grafo = grafo
+        self.modo = modo
+        self.faltam = {}          # nó visitado -> vizinhos ainda não visitados
+        self.ordem = array('i')   # BFS: visitados na ordem de visita
+        self.cabeca = 0
+        self.pilha = []           # DFS: caminho da raiz até o último visitado
+
+    def __len__(self):
+        return len(self.faltam)
+
+    def visitar(self, u):
+        faltam, flags = self.faltam, self.grafo.flags
+        flags[u] = (flags[u] | VISITADO) & ~NA_FILA
+        pendentes = 0
+        for v in self.grafo.vizinhos(u):
+            if v in faltam:
+                faltam[v] -= 1
+            else:
+                pendentes += 1
+                flags[v] |= NA_FILA
+        faltam[u] = pendentes
+        if self.modo == "BFS":
+            self.ordem.append(u)
+        else:
+            self.pilha.append(u)
+
+    # O nó cujos vizinhos não visitados são as jogadas legais agora (None se não sobrou nenhuma).
+    def expandindo(self):
+        faltam = self.faltam
+        if self.modo == "BFS":
+            ordem = self.ordem
+            while self.cabeca < len(ordem) and not faltam[ordem[self.cabeca]]:
+                self.cabeca += 1
+            return ordem[self.cabeca] if self.cabeca < len(ordem) else None
+        pilha = self.pilha
+        while pilha and not faltam[pilha[-1]]:
+            pilha.pop()
+        return pilha[-1] if pilha else None
+
+    def aceita(self, v):
+        if v in self.faltam:
+            return False
+        u = self.expandindo()
+        return u is not None and self.grafo.tem_aresta(u, v)
+
+    # Modo infinito: as arestas novas podem ligar nós já visitados (da última camada) aos nós novos.
+    def anexar(self, primeira_aresta):
+        arestas, faltam, flags = self.grafo.arestas, self.faltam, self.grafo.flags
+        for k in range(2 * primeira_aresta, len(arestas), 2):
+            u, v = arestas[k], arestas[k + 1]
+            if (u in faltam) == (v in faltam): continue
+            visitado, novo = (u, v) if u in faltam else (v, u)
+            faltam[visitado] += 1
+            flags[novo] |= NA_FILA
+
+# [BLOCO DO GERADOR CLÁSSICO (camadas que cabem na tela)]
+
+# Até TENTATIVAS_POSICAO sorteios em volta do centro do setor; sem nenhum livre, o nó fica no centro.
+def posicionar_no(validar_posicao, centro_setor, y_base, largura, altura, rng):
+    for _ in range(TENTATIVAS_POSICAO):
+        teste_x = max(40, min(largura - 40, centro_setor + rng.randint(-JITTER_X, JITTER_X)))
+        teste_y = max(40, min(altura - 40, y_base + rng.randint(-JITTER_Y, JITTER_Y)))
+        if validar_posicao(teste_x, teste_y):
+            return teste_x, teste_y, True
+    return centro_setor, y_base, False
+
+def gerar_grafo(config, modo, rng=random):
+    grafo = GrafoCompacto()
+    largura, altura = dimensoes_mundo(config)
+    num_camadas = config["camadas"]
+    densidade_ciclos = config["ciclos"]
+    min_nos = config["min_nos"]
+    max_nos = config["max_nos"]
+
+    margem_x = MARGEM_X
+    margem_y = MARGEM_Y
+    altura_nivel = config.get("altura_camada", (altura - margem_y - 80) // num_camadas)
+
+    id_counter = 0
+    indice = GradeEspacial(grafo)
+    
+    def validar_posicao(x, y, raio_min=RAIO_MIN):
+        return not indice.tem_no_perto(x, y, raio_min)
+
+    root = grafo.add_node(largura // 2, margem_y)
+    indice.inserir_no(root, largura // 2, margem_y)
+    camada_anterior = [root] 
+    id_counter += 1
+
+    for i in range(1, num_camadas + 1):
+        y_base = margem_y + (i * altura_nivel)
+        qtd_nos = rng.randint(min_nos, max_nos)
+        largura_setor = (largura - 2 * margem_x) // qtd_nos
+        camada_atual = []
+        
+        for j in range(qtd_nos):
+            centro_setor = margem_x + (j * largura_setor) + (largura_setor // 2)
+            
+            pos_x, pos_y, posicao_valida = posicionar_no(validar_posicao, centro_setor, y_base, largura, altura, rng)
+            if not posicao_valida:
+                grafo.falhas_posicao += 1
+
+            novo_no = grafo.add_node(pos_x, pos_y)
+            indice.inserir_no(novo_no, pos_x, pos_y)
+            camada_atual.append(novo_no)
+            id_counter += 1
+            
+            pai = rng.choice(camada_anterior)
+            grafo.add_edge(pai, novo_no)
+
+        chance_ciclo = densidade_ciclos
+        if modo == "DFS": chance_ciclo *= 0.5 
+
+        for no in camada_atual:
+            if rng.random() < chance_ciclo and id_counter > 5:
+                alvo_id = rng.randint(0, id_counter - 2)
+                if alvo_id != no:
+                    dist_alvo = math.hypot(grafo.xs[alvo_id] - grafo.xs[no], grafo.ys[alvo_id] - grafo.ys[no])
+                    if dist_alvo < DISTANCIA_CICLO: 
+                        grafo.add_edge(no, alvo_id)
+
+        camada_anterior = camada_atual
+
+    return grafo
+
+# [BLOCO DO GERADOR VETORIZADO (níveis gigantes: todas as camadas posicionadas e ligadas de uma vez)]
+
+# Só vale quando as camadas estão longe o bastante para o jitter de uma nunca encostar na outra;
+# aí cada nó só pode colidir com vizinhos da própria camada.
+def gerador_da_config(config):
+    if config.get("altura_camada", 0) >= 2 * JITTER_Y + RAIO_MIN:
+        return GERADOR_VETORIZADO
+    return GERADOR_CLASSICO
+
+# Mesmas regras do gerador clássico: jitter por setor, TENTATIVAS_POSICAO candidatos por nó, distância
+# mínima RAIO_MIN e ciclos só abaixo de DISTANCIA_CICLO. Pais e alvos de ciclo são sorteados na
+# vizinhança do setor (e não no nível inteiro) para as arestas continuarem curtas em mundos largos.
+def gerar_grafo_vetorizado(config, modo, rng=random):
+    if carregar_numpy() is None:
+        raise RuntimeError("este nível usa o gerador vetorizado e precisa do numpy (pip install numpy)")
+    rng = np.random.default_rng(rng.getrandbits(64))
+    largura, altura = dimensoes_mundo(config)
+    altura_nivel = config["altura_camada"]
+    chance_ciclo = config["ciclos"] * (0.5 if modo == "DFS" else 1.0)
+
+    # Cada nó (fora a raiz) vira uma linha: camada, posição na camada e tamanho da camada.
+    qtds = rng.integers(config["min_nos"], config["max_nos"] + 1, size=config["camadas"])
+    inicio_camada = 1 + np.concatenate(([0], np.cumsum(qtds)[:-1]))
+    camada = np.repeat(np.arange(1, len(qtds) + 1), qtds)
+    ids = np.arange(1, 1 + len(camada))
+    pos = ids - inicio_camada[camada - 1]
+    qtd = qtds[camada - 1]
+
+    largura_setor = (largura - 2 * MARGEM_X) // qtd
+    centros = MARGEM_X + pos * largura_setor + largura_setor // 2
+    y_base = MARGEM_Y + camada * altura_nivel
+
+    # Nós a "passo" setores de distância nunca colidem entre si, então cada classe de resto
+    # módulo passo é posicionada de uma vez, checando só os vizinhos de classes já posicionadas.
+    # Cada tentativa sorteia jitter só para os nós que ainda não acharam lugar; quem esgota as
+    # TENTATIVAS_POSICAO fica no centro do setor, como no gerador clássico.
+    px, py = centros.copy(), y_base.copy()
+    colocado = np.zeros(len(ids), bool)
+    falhas = 0
+    passo = max(1, -(-(2 * JITTER_X + RAIO_MIN) // max(int(largura_setor.min()), 1)))
+    for classe in range(passo):
+        pendentes = np.nonzero(pos % passo == classe)[0]
+        vizinhos = []
+        for d in range(1, passo):
+            for viz in (pendentes - d, pendentes + d):
+                dentro = (viz >= 0) & (viz < len(ids))
+                viz = np.where(dentro, viz, 0)
+                vizinhos.append((viz, dentro & colocado[viz] & (camada[viz] == camada[pendentes])))
+
+        for _ in range(TENTATIVAS_POSICAO):
+            if not len(pendentes):
+                break
+            teste_x = np.clip(centros[pendentes] + rng.integers(-JITTER_X, JITTER_X + 1, len(pendentes)), 40, largura - 40)
+            teste_y = np.clip(y_base[pendentes] + rng.integers(-JITTER_Y, JITTER_Y + 1, len(pendentes)), 40, altura - 40)
+            ok = np.ones(len(pendentes), bool)
+            for viz, checar in vizinhos:
+                ok &= ~(checar & ((teste_x - px[viz]) ** 2 + (teste_y - py[viz]) ** 2 < RAIO_MIN ** 2))
+            px[pendentes[ok]] = teste_x[ok]
+            py[pendentes[ok]] = teste_y[ok]
+            pendentes = pendentes[~ok]
+            vizinhos = [(viz[~ok], checar[~ok]) for viz, checar in vizinhos]
+        falhas += len(pendentes)
+        colocado[pos % passo == classe] = True
+
+    xs = np.concatenate(([largura // 2], px))
+    ys = np.concatenate(([MARGEM_Y], py))
+
+    # Camada anterior de cada nó (a da camada 1 é só a raiz).
+    qtd_anterior = np.where(camada == 1, 1, qtds[camada - 2])
+    inicio_anterior = np.where(camada == 1, 0, inicio_camada[camada - 2])
+    proporcional = ((pos + 0.5) * qtd_anterior / qtd).astype(np.int64)
+    pais = inicio_anterior + np.clip(proporcional + rng.integers(-1, 2, len(ids)), 0, qtd_anterior - 1)
+
+    deslocamento = rng.integers(-3, 4, len(ids))
+    alvo = np.where(rng.random(len(ids)) < 0.5,
+                    inicio_camada[camada - 1] + np.clip(pos + deslocamento, 0, qtd - 1),
+                    inicio_anterior + np.clip(proporcional + deslocamento, 0, qtd_anterior - 1))
+    dist2 = (xs[alvo] - px) ** 2 + (ys[alvo] - py) ** 2
+    ciclo = ((rng.random(len(ids)) < chance_ciclo) & (inicio_camada[camada - 1] + qtd > 5)
+             & (alvo != ids) & (dist2 < DISTANCIA_CICLO ** 2))
+
+    # Cada nó propõe no máximo um ciclo, então só há repetição quando o alvo já é o pai
+    # ou quando dois nós se escolheram mutuamente (fica a proposta do menor id).
+    linha_alvo = np.maximum(alvo - 1, 0)
+    ciclo &= alvo != pais
+    ciclo &= (alvo == 0) | (pais[linha_alvo] != ids)
+    ciclo &= ~((alvo > 0) & (alvo < ids) & ciclo[linha_alvo] & (alvo[linha_alvo] == ids))
+
+    pares = np.concatenate((np.stack((pais, ids), axis=1), np.stack((ids[ciclo], alvo[ciclo]), axis=1)))
+    grafo = GrafoCompacto.de_arrays(xs, ys, pares)
+    grafo.falhas_posicao = falhas
+    return grafo
+
+# [BLOCO DO MODO INFINITO (camadas novas abaixo da fronteira enquanto o jogador ainda percorre)]
+# Uma camada nova só se liga à anterior (pais e ciclos) e a si mesma, então tudo acima da última
+# camada já tem a adjacência definitiva. Cada crescimento custa só a camada nova: o CSR refaz as
+# linhas da última camada em diante, a grade recebe os itens novos e a fronteira só confere as
+# arestas novas.
+
+INFINITO = "Infinito"
+CONFIG_INFINITO = {"camadas": 4, "ciclos": 0.3, "min_nos": 2, "max_nos": 5, "altura_camada": 110}
+FOLGA_INFINITO = 6            # nós ainda não visitados já gerados à frente do jogador
+MAX_CAMADAS_POR_JOGADA = 16
+PONTOS_POR_NO_INFINITO = 100
+
+# Tem os mesmos campos de FasePreparada, então entra no jogo por instalar_fase.
+class FaseInfinita:
+    def __init__(self, modo, semente=None, config=CONFIG_INFINITO):
+        if semente is None:
+            semente = random.getrandbits(32)
+        self.semente = semente
+        self.rng = random.Random(semente)
+        self.config = config
+        self.modo = modo
+        self.gerador = GERADOR_INFINITO
+        self.largura_mundo, self.altura_mundo = LARGURA, ALTURA
+        self.camadas = 0
+
+        self.grafo = GrafoCompacto()
+        self.grafo.add_node(LARGURA // 2, MARGEM_Y)
+        self.grafo.compilar()
+        self.indice = GradeEspacial(self.grafo)
+        self.ultima_camada = [0]
+        for _ in range(config["camadas"]):
+            self.crescer()
+
+    # Gera a próxima camada com as regras do gerador clássico; devolve o primeiro nó e a primeira aresta novos.
+    def crescer(self):
+        config, rng, grafo, indice = self.config, self.rng, self.grafo, self.indice
+        self.camadas += 1
+        y_base = MARGEM_Y + self.camadas * config["altura_camada"]
+        altura = y_base + 80
+        primeiro_no, primeira_aresta = len(grafo), grafo.num_arestas
+
+        xs, ys, pares = [], [], []
+        def validar_posicao(x, y, raio_min=RAIO_MIN):
+            return (not indice.tem_no_perto(x, y, raio_min)
+                    and all(math.hypot(x - nx, y - ny) >= raio_min for nx, ny in zip(xs, ys)))
+
+        qtd_nos = rng.randint(config["min_nos"], config["max_nos"])
+        largura_setor = (self.largura_mundo - 2 * MARGEM_X) // qtd_nos
+        for j in range(qtd_nos):
+            centro_setor = MARGEM_X + (j * largura_setor) + (largura_setor // 2)
+            x, y, valida = posicionar_no(validar_posicao, centro_setor, y_base, self.largura_mundo, altura, rng)
+            if not valida:
+                grafo.falhas_posicao += 1
+            xs.append(x)
+            ys.append(y)
+            pares += (rng.choice(self.ultima_camada), primeiro_no + j)
+
+        # Alvos de ciclo: a camada anterior e os nós da própria camada que vieram antes.
+        chance_ciclo = config["ciclos"] * (0.5 if self.modo == "DFS" else 1.0)
+        candidatos = list(self.ultima_camada)
+        for j in range(qtd_nos):
+            no = primeiro_no + j
+            if rng.random() < chance_ciclo:
+                alvo = rng.choice(candidatos)
+                ax, ay = (grafo.xs[alvo], grafo.ys[alvo]) if alvo < primeiro_no else (xs[alvo - primeiro_no], ys[alvo - primeiro_no])
+                if alvo != pares[2 * j] and math.hypot(ax - xs[j], ay - ys[j]) < DISTANCIA_CICLO:
+                    pares += (no, alvo)
+            candidatos.append(no)
+
+        grafo.anexar(xs, ys, pares)
+        for id in range(primeiro_no, len(grafo)):
+            indice.inserir_no(id, grafo.xs[id], grafo.ys[id])
+        for a in range(primeira_aresta, grafo.num_arestas):
+            indice.inserir_aresta(a)
+        self.ultima_camada = list(range(primeiro_no, len(grafo)))
+        self.altura_mundo = max(ALTURA, altura)
+        return primeiro_no, primeira_aresta
+
+# [BLOCO DE FASES PREPARADAS (geração fora do laço do jogo, em processos ou threads)]
+
+class FasePreparada:
+    __slots__ = ("largura_mundo", "altura_mundo", "grafo", "indice", "semente", "gerador")
+
+    def __init__(self, largura_mundo, altura_mundo, grafo, indice, semente=None, gerador=GERADOR_CLASSICO):
+        self.largura_mundo = largura_mundo
+        self.altura_mundo = altura_mundo
+        self.grafo = grafo
+        self.indice = indice
+        self.semente = semente
+        self.gerador = gerador
+
+# Tudo o que uma fase precisa antes do primeiro frame: grafo compilado e índice espacial.
+# Não toca em estado do jogo, então pode rodar num processo de trabalho. Toda fase tem uma semente
+# (sorteada quando não vem uma); a mesma (dificuldade, modo, semente) sempre gera a mesma fase.
+def preparar_fase(config, modo, semente=None):
+    if semente is None:
+        semente = random.getrandbits(32)
+    largura, altura = dimensoes_mundo(config)
+    grafo = gerar_grafo_semeado(config, modo, semente)
+    return FasePreparada(largura, altura, grafo, GradeEspacial(grafo), semente, gerador_da_config(config))
+
+# Só o grafo compilado da fase (sem índice espacial), para ferramentas que medem a geração.
+def gerar_grafo_semeado(config, modo, semente):
+    rng = random.Random(semente)
+    if gerador_da_config(config) == GERADOR_VETORIZADO:
+        grafo = gerar_grafo_vetorizado(config, modo, rng)
+    else:
+        grafo = gerar_grafo(config, modo, rng)
+    grafo.compilar()
+    return grafo
+
+# Mesma semente para todo mundo no mesmo dia (o modo e a dificuldade continuam mudando a fase).
+def semente_diaria(dia=None):
+    dia = dia or datetime.date.today()
+    return int.from_bytes(hashlib.blake2b(f"desafio-{dia.isoformat()}".encode(), digest_size=4).digest(), "little")
+
+PROFUNDIDADE_RESERVA = 2
+PRIORIDADE_TRABALHADOR = 10  # incremento de nice: a pré-geração nunca disputa CPU de igual com o jogo
+
+def baixar_prioridade():
+    try:
+        os.nice(PRIORIDADE_TRABALHADOR)
+    except (AttributeError, OSError):  # Windows não tem os.nice
+        pass
+
+# Mantém até PROFUNDIDADE_RESERVA fases prontas por (modo, dificuldade). Usa processos (spawn,
+# para não herdar a janela nem as threads do jogo) e cai para threads se não der para criá-los.
+class ReservaFases:
+    def __init__(self, trabalhadores=None):
+        # Deixa um núcleo livre para o laço do jogo quando houver mais de um.
+        self.trabalhadores = trabalhadores or max(1, min(2, (os.cpu_count() or 1) - 1))
+        self.prontas = {}
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        try:
+            self.executor = ProcessPoolExecutor(self.trabalhadores, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=baixar_prioridade)
+        except (OSError, ValueError, NotImplementedError):
+            self.executor = ThreadPoolExecutor(self.trabalhadores, thread_name_prefix="fases")
+
+    def encomendar(self, modo, nome_dificuldade):
+        config = DIFICULDADES[nome_dificuldade]
+        from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+        try:
+            return self.executor.submit(preparar_fase, config, modo)
+        except (OSError, BrokenExecutor) as erro:
+            warnings.warn(f"Pré-geração em processos indisponível ({erro}); usando threads.")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = ThreadPoolExecutor(self.trabalhadores, thread_name_prefix="fases")
+            return self.executor.submit(preparar_fase, config, modo)
+
+    def abastecer(self, modo, nome_dificuldade):
+        fila = self.prontas.setdefault((modo, nome_dificuldade), deque())
+        while len(fila) < PROFUNDIDADE_RESERVA:
+            fila.append(self.encomendar(modo, nome_dificuldade))
+
+    # Devolve uma fase já terminada (ou None, e quem chamou gera na hora) e repõe a fila.
+    def retirar(self, modo, nome_dificuldade):
+        fila = self.prontas.get((modo, nome_dificuldade), ())
+        fase = None
+        for futuro in fila:
+            if futuro.done():
+                fila.remove(futuro)
+                try:
+                    fase = futuro.result()
+                except Exception as erro:
+                    warnings.warn(f"Falha ao pré-gerar {modo}/{nome_dificuldade}: {erro}")
+                break
+        self.abastecer(modo, nome_dificuldade)
+        return fase
+
+    def fechar(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# [BLOCO DA CLASSE NÚCLEO (estado e regras do jogo, sem renderização)]
+
+class NucleoJogo:
+    def __init__(self, recordes=None):
+        self.grafo = GrafoCompacto()
+        self.nodes = VistaNos(self.grafo)
+        self.largura_mundo, self.altura_mundo = LARGURA, ALTURA
+        self.indice = GradeEspacial(self.grafo)
+        # Fases geradas em segundo plano (ReservaFases) e fases pré-geradas com semente (BancoFases);
+        # sem nenhum dos dois tudo é gerado na hora.
+        self.reserva = None
+        self.banco = None
+        self.semente = None
+        self.gerador = GERADOR_CLASSICO
+        self.infinito = None  # FaseInfinita da partida atual, se for o modo infinito
+        self.no_atual = None
+        self.no_hover = None
+        self.modo = "BFS"
+        self.fronteira = Fronteira(self.grafo, self.modo)  # quais cliques são legais agora
+        
+        self.estado = ESTADO_MENU
+        self.energia_max = 100
+        self.energia_atual = 100
+        self.dificuldade_atual = "Normal"
+        
+        self.start_ticks = 0
+        self.tempo_final = 0.0
+        self.pontuacao_final = 0
+        self.nome_jogador = ""
+        # Cliques da partida atual (ms desde o início e posição no mundo), para o replay (replay.py).
+        self.cliques_ms = array('I')
+        self.cliques_xy = array('f')
+        # ArmazemRecordes vem de fora (o jogo abre o do disco); sem ele as partidas não são gravadas.
+        self.recordes = recordes
+
+    # Milissegundos de um relógio monotônico; o front end troca pelo relógio do pygame.
+    def relogio(self):
+        return int(time.monotonic() * 1000)
+
+    # Ganchos chamados quando o grafo muda; a versão headless não tem nada para redesenhar.
+    def ao_gerar_fase(self):
+        pass
+
+    def ao_visitar(self, node):
+        pass
+
+    def ao_crescer(self, primeiro_no, primeira_aresta):
+        pass
+
+    def salvar_recorde(self):
+        if not self.recordes: return
+        chave = f"{self.modo}_{self.dificuldade_atual}"
+        self.recordes.salvar(chave, self.nome_jogador, self.pontuacao_final, self.tempo_final)
+
+    # Prepara o início de um nível.
+    def iniciar_nivel(self, nome_dificuldade, semente=None):
+        self.dificuldade_atual = nome_dificuldade
+        fase = None
+        if nome_dificuldade == INFINITO:
+            fase = FaseInfinita(self.modo, semente)
+        elif semente is None and self.reserva:
+            fase = self.reserva.retirar(self.modo, nome_dificuldade)
+        elif semente is not None and self.banco:
+            fase = self.banco.buscar(nome_dificuldade, self.modo, semente)
+        if fase is None:
+            fase = preparar_fase(DIFICULDADES[nome_dificuldade], self.modo, semente)
+        self.instalar_fase(fase)
+        self.estado = ESTADO_JOGANDO
+        self.start_ticks = self.relogio()
+
+    def gerar_fase(self, config):
+        self.instalar_fase(preparar_fase(config, self.modo))
+
+    def instalar_fase(self, fase):
+        self.largura_mundo, self.altura_mundo = fase.largura_mundo, fase.altura_mundo
+        self.semente = fase.semente
+        self.gerador = fase.gerador
+        self.grafo = fase.grafo
+        self.nodes = VistaNos(fase.grafo)
+        self.indice = fase.indice
+        self.energia_atual = self.energia_max
+        self.cliques_ms = array('I')
+        self.cliques_xy = array('f')
+
+        self.fronteira = Fronteira(fase.grafo, self.modo)
+        self.fronteira.visitar(0)
+        self.no_atual = self.nodes[0]
+        self.no_hover = None
+        self.infinito = fase if isinstance(fase, FaseInfinita) else None
+        self.ao_gerar_fase()
+        if self.infinito:
+            self.crescer()
+
+    # Modo infinito: novas camadas até haver FOLGA_INFINITO nós por visitar e o último visitado sair
+    # da última camada (a única que ainda ganha vizinhos; a fronteira conta com a adjacência final).
+    def crescer(self):
+        for _ in range(MAX_CAMADAS_POR_JOGADA):
+            if self.restantes >= FOLGA_INFINITO and self.no_atual.id < self.infinito.ultima_camada[0]:
+                break
+            primeiro_no, primeira_aresta = self.infinito.crescer()
+            self.altura_mundo = self.infinito.altura_mundo
+            self.fronteira.anexar(primeira_aresta)
+            self.ao_crescer(primeiro_no, primeira_aresta)
+
+    @property
+    def visitados(self):
+        return len(self.fronteira)
+
+    @property
+    def restantes(self):
+        return len(self.grafo) - len(self.fronteira)
+
+    # [BLOCO DE JOGADAS (clique no tabuleiro, validação e pontuação)]
+    def clicar(self, pos_mouse):
+        if self.estado != ESTADO_JOGANDO:
+            return
+
+        # O relógio é lido uma vez por clique e a posição passa pelo float32 em que fica gravada:
+        # reproduzir os cliques gravados dá exatamente o mesmo resultado.
+        agora = self.relogio()
+        self.cliques_ms.append(agora - self.start_ticks)
+        self.cliques_xy.extend(pos_mouse[:2])
+        node = self.no_em(self.cliques_xy[-2:], 30)
+        if node is not None:
+            self.validar_movimento(node, agora)
+
+    def validar_movimento(self, node_clicado, agora=None):
+        if agora is None:
+            agora = self.relogio()
+        if node_clicado.visitado: return 
+        if not self.restantes: return
+
+        # Qualquer ordem BFS/DFS legal vale, não só a que percorrer() daria.
+        if self.fronteira.aceita(node_clicado.id):
+            self.fronteira.visitar(node_clicado.id)
+            self.no_atual = node_clicado
+            self.ao_visitar(node_clicado)
+            if self.infinito:
+                self.crescer()
+            
+            if not self.restantes:
+                self.tempo_final = (agora - self.start_ticks) / 1000
+                bonus_energia = int(self.energia_atual * 100)
+                bonus_tempo = int(max(0, 5000 - (self.tempo_final * 10)))
+                self.pontuacao_final = bonus_energia + bonus_tempo
+                self.nome_jogador = "" 
+                self.estado = ESTADO_INPUT_NOME
+        else:
+            self.energia_atual -= 15
+            if self.energia_atual <= 0:
+                self.energia_atual = 0
+                if self.infinito:
+                    self.encerrar_infinito(agora)
+                else:
+                    self.estado = ESTADO_DERROTA
+
+    # O modo infinito só acaba quando a energia zera; a pontuação é o quanto se avançou.
+    def encerrar_infinito(self, agora):
+        self.tempo_final = (agora - self.start_ticks) / 1000
+        self.pontuacao_final = (self.visitados - 1) * PONTOS_POR_NO_INFINITO
+        self.nome_jogador = ""
+        self.estado = ESTADO_INPUT_NOME
+
+    def no_em(self, pos, raio):
+        id = self.indice.no_em(pos[0], pos[1], raio)
+        return None if id is None else self.nodes[id]
+
+    # Só o nó que perdeu e o que ganhou o hover têm a flag alterada.
+    def update_hover(self, pos_mouse):
+        if self.estado != ESTADO_JOGANDO: return
+        anterior = self.no_hover
+        self.no_hover = self.no_em(pos_mouse, 25)
+        if anterior != self.no_hover:
+            if anterior is not None:
+                anterior.hover = False
+            if self.no_hover is not None:
+                self.no_hover.hover = True
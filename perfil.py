@@ -0,0 +1,183 @@
+import csv
+import functools
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pygame
+
+# [BLOCO DO PERFILADOR (tempo por fase do laço, por método de desenho e contagem de draw calls)]
+# Cada frame acumula milissegundos por fase; no fim do frame a amostra entra na janela do overlay
+# (F3) e, se houver arquivo, vira uma linha no CSV (ou um objeto por linha, se terminar em .jsonl).
+# Fases podem ser aninhadas (ex.: desenhar_regiao_grafo dentro de draw), então não somam o frame.
+# Os métodos medidos e as funções de pygame.draw só são trocados enquanto há overlay ou arquivo;
+# fora disso (e depois de fechar) o jogo roda com os originais.
+
+JANELA_AMOSTRAS = 240
+ORCAMENTO_MS = 1000 / 60
+FASES_FIXAS = ("espera", "camera", "update_hover", "eventos", "draw", "perfil", "flip", "tick")
+FUNCOES_DRAW = ("line", "lines", "aalines", "aaline", "circle", "rect", "polygon", "ellipse", "arc")
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+class Perfilador:
+    def __init__(self, arquivo=None):
+        self.overlay = False
+        self.frame = 0
+        self.fases = dict.fromkeys(FASES_FIXAS, 0.0)
+        self.chamadas_draw = 0
+        self.inicio_frame = time.perf_counter()
+        self.intervalos = deque(maxlen=JANELA_AMOSTRAS)  # frame inteiro, incluindo as esperas
+        self.trabalho = deque(maxlen=JANELA_AMOSTRAS)    # frame sem as esperas (ociosidade e tick)
+        self.chamadas = deque(maxlen=JANELA_AMOSTRAS)
+        self.ultimo = dict(self.fases)
+
+        self.arquivo = None
+        self.escritor = None
+        if arquivo:
+            self.arquivo = open(arquivo, 'w', newline='')
+            if not arquivo.endswith(".jsonl"):
+                self.escritor = csv.writer(self.arquivo)
+        self.colunas = None
+
+        self.alvos = []       # (objeto, nomes) passados a instrumentar
+        self.trocados = []    # (objeto, nome, valor anterior no __dict__ ou None) enquanto instrumentado
+        self.draw_originais = {}
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[fase] = self.fases.get(fase, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def envolver(self, funcao, fase):
+        @functools.wraps(funcao)
+        def medido(*args, **kwargs):
+            with self.medir(fase):
+                return funcao(*args, **kwargs)
+        return medido
+
+    @property
+    def ativo(self):
+        return self.overlay or self.arquivo is not None
+
+    # Registra os métodos do objeto a medir; a troca só acontece enquanto o perfilador está ativo.
+    def instrumentar(self, objeto, nomes):
+        self.alvos.append((objeto, nomes))
+        for nome in nomes:
+            self.fases.setdefault(nome, 0.0)
+        if self.ativo:
+            self.ligar()
+
+    # Troca os métodos por versões medidas (só na instância; a classe não muda) e conta as draw calls.
+    def ligar(self):
+        self.desligar()
+        for objeto, nomes in self.alvos:
+            for nome in nomes:
+                self.trocados.append((objeto, nome, vars(objeto).get(nome)))
+                setattr(objeto, nome, self.envolver(getattr(objeto, nome), nome))
+        self.contar_draw_calls()
+
+    def desligar(self):
+        for objeto, nome, anterior in reversed(self.trocados):
+            if anterior is None:
+                delattr(objeto, nome)
+            else:
+                setattr(objeto, nome, anterior)
+        self.trocados = []
+        for nome, original in self.draw_originais.items():
+            setattr(pygame.draw, nome, original)
+        self.draw_originais = {}
+
+    # pygame.draw é um módulo Python, então dá para contar as chamadas envolvendo suas funções.
+    def contar_draw_calls(self):
+        for nome in FUNCOES_DRAW:
+            original = self.draw_originais[nome] = getattr(pygame.draw, nome)
+
+            def contado(*args, _original=original, **kwargs):
+                self.chamadas_draw += 1
+                return _original(*args, **kwargs)
+
+            setattr(pygame.draw, nome, contado)
+
+    def fim_frame(self):
+        agora = time.perf_counter()
+        total = (agora - self.inicio_frame) * 1000
+        self.inicio_frame = agora
+
+        self.intervalos.append(total)
+        self.trabalho.append(total - self.fases.get("tick", 0.0) - self.fases.get("espera", 0.0))
+        self.chamadas.append(self.chamadas_draw)
+        self.ultimo = self.fases
+        if self.arquivo:
+            self.exportar(total)
+
+        self.frame += 1
+        self.fases = dict.fromkeys(self.fases, 0.0)
+        self.chamadas_draw = 0
+
+    def exportar(self, total):
+        linha = {"frame": self.frame, "total_ms": round(total, 3), "draw_calls": self.chamadas_draw}
+        linha.update((fase, round(ms, 3)) for fase, ms in self.fases.items())
+        if self.escritor is None:
+            self.arquivo.write(json.dumps(linha) + "\n")
+            return
+        # As colunas saem do primeiro frame; por isso toda fase é registrada antes do laço começar.
+        if self.colunas is None:
+            self.colunas = list(linha)
+            self.escritor.writerow(self.colunas)
+        self.escritor.writerow([linha.get(coluna, 0.0) for coluna in self.colunas])
+
+    def alternar_overlay(self):
+        self.overlay = not self.overlay
+        if not self.ativo:
+            self.desligar()
+        elif not self.draw_originais:
+            self.ligar()
+
+    def desenhar(self, tela, fonte):
+        if not self.overlay:
+            return
+        largura, altura = 300, 154 + 16 * len(self.ultimo)
+        painel = pygame.Surface((largura, altura), pygame.SRCALPHA)
+        painel.fill((0, 0, 0, 190))
+
+        # Gráfico: uma barra por frame (trabalho), com a linha do orçamento de 60 FPS.
+        escala = 80 / (2 * ORCAMENTO_MS)
+        base = 90
+        for i, ms in enumerate(self.trabalho):
+            h = min(80, int(ms * escala))
+            cor = (0, 200, 140) if ms <= ORCAMENTO_MS else (230, 70, 70)
+            painel.fill(cor, (10 + i, base - h, 1, h))
+        linha_y = base - int(ORCAMENTO_MS * escala)
+        painel.fill((250, 200, 60), (10, linha_y, JANELA_AMOSTRAS, 1))
+
+        textos = [
+            f"frame p50 {percentil(self.intervalos, 50):.1f} ms  p99 {percentil(self.intervalos, 99):.1f} ms",
+            f"trabalho p50 {percentil(self.trabalho, 50):.1f} ms  p99 {percentil(self.trabalho, 99):.1f} ms",
+            f"draw calls {self.chamadas[-1] if self.chamadas else 0}",
+        ]
+        for i, texto in enumerate(textos):
+            painel.blit(fonte.render(texto, True, (230, 230, 230)), (10, 98 + i * 16))
+        y = 98 + len(textos) * 16
+        for fase, ms in self.ultimo.items():
+            cor = (230, 230, 230) if ms >= 0.05 else (120, 120, 120)
+            valor = fonte.render(f"{ms:.2f} ms", True, cor)
+            painel.blit(fonte.render(fase, True, cor), (10, y))
+            painel.blit(valor, (largura - 10 - valor.get_width(), y))
+            y += 16
+        tela.blit(painel, (tela.get_width() - largura - 10, 90))
+
+    def fechar(self):
+        self.desligar()
+        if self.arquivo:
+            self.arquivo.close()
+            self.arquivo = None
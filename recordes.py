@@ -0,0 +1,162 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import warnings
+
+# [BLOCO DO PLACAR (SQLite com histórico completo e escrita em segundo plano)]
+# A tabela guarda todas as partidas; o índice (chave, pontos DESC, id) responde o top-N e a
+# posição de uma pontuação sem varrer o histórico. As gravações vão para uma fila consumida
+# por uma thread própria, então salvar nunca trava um frame.
+
+ARQUIVO_RECORDES = "recordes_graph_arcade.db"
+ARQUIVO_RECORDES_LEGADO = "recordes_graph_arcade.json"
+TAMANHO_CACHE_TOP = 10
+LOTE_ESCRITA = 256
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS recordes (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave  TEXT    NOT NULL,
+    nome   TEXT    NOT NULL,
+    pontos INTEGER NOT NULL,
+    tempo  REAL    NOT NULL,
+    data   REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recordes_chave_pontos ON recordes (chave, pontos DESC, id);
+"""
+
+def conectar(caminho):
+    conexao = sqlite3.connect(caminho, timeout=5)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+
+class ArmazemRecordes:
+    def __init__(self, caminho, arquivo_legado=None):
+        self.caminho = caminho
+        self.conexao = conectar(caminho)
+        self.conexao.executescript(ESQUEMA)
+        if arquivo_legado:
+            self.migrar_json(arquivo_legado)
+
+        # chave -> melhores entradas [nome, pontos, tempo]; atualizado na hora em que se salva,
+        # antes mesmo da thread gravar no disco.
+        self.cache_top = {}
+        # Entradas na fila que ainda não chegaram ao banco (contam na posição).
+        self.pendentes = []
+        self.trava = threading.Lock()
+        # Segura commit + limpeza dos pendentes juntos, para a posição não contar uma entrada duas vezes.
+        self.trava_banco = threading.Lock()
+        self.fila = queue.Queue()
+        self.escritor = threading.Thread(target=self.laco_escrita, name="recordes", daemon=True)
+        self.escritor.start()
+
+    # Importa o placar antigo (JSON inteiro) uma única vez e renomeia o arquivo.
+    def migrar_json(self, arquivo):
+        if not os.path.exists(arquivo):
+            return
+        try:
+            with open(arquivo, 'r') as f:
+                dados = json.load(f)
+            linhas = [(chave, str(nome), int(pontos), float(tempo), 0.0)
+                      for chave, entradas in dados.items()
+                      for nome, pontos, tempo in entradas]
+        except (OSError, ValueError, TypeError, AttributeError) as erro:
+            warnings.warn(f"Placar antigo '{arquivo}' ignorado: {erro}")
+            return
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT INTO recordes (chave, nome, pontos, tempo, data) VALUES (?, ?, ?, ?, ?)", linhas)
+        os.replace(arquivo, arquivo + ".migrado")
+
+    def laco_escrita(self):
+        conexao = conectar(self.caminho)
+        rodando = True
+        while rodando:
+            lote = [self.fila.get()]
+            while len(lote) < LOTE_ESCRITA:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            if None in lote:
+                rodando = False
+                lote = [item for item in lote if item is not None]
+            if lote:
+                with self.trava_banco:
+                    try:
+                        with conexao:
+                            conexao.executemany(
+                                "INSERT INTO recordes (chave, nome, pontos, tempo, data) VALUES (?, ?, ?, ?, ?)", lote)
+                    except sqlite3.Error as erro:
+                        warnings.warn(f"Falha ao gravar {len(lote)} recorde(s): {erro}")
+                    with self.trava:
+                        del self.pendentes[:len(lote)]
+            for _ in lote:
+                self.fila.task_done()
+        self.fila.task_done()
+        conexao.close()
+
+    # Pode ser chamado de várias threads: pendentes e fila ficam na mesma ordem (a thread de escrita
+    # tira dos pendentes tantos quantos gravou) e o cache não perde entradas.
+    def salvar(self, chave, nome, pontos, tempo):
+        linha = (chave, nome, int(pontos), float(tempo), time.time())
+        with self.trava:
+            self.pendentes.append(linha)
+            self.fila.put(linha)
+
+            # Chave fora do cache: a próxima consulta lê banco + pendentes e já encontra esta entrada.
+            top = self.cache_top.get(chave)
+            if top is None:
+                return
+            # Empates ficam atrás de quem chegou antes, como no sort estável original.
+            i = 0
+            while i < len(top) and top[i][1] >= linha[2]:
+                i += 1
+            top.insert(i, [nome, linha[2], linha[3]])
+            del top[TAMANHO_CACHE_TOP:]
+
+    def top(self, chave, n=5):
+        if n <= TAMANHO_CACHE_TOP:
+            with self.trava:
+                top = self.cache_top.get(chave)
+                if top is not None:
+                    return [list(linha) for linha in top[:n]]
+        # Banco + pendentes, sem esperar a fila esvaziar (como em posicao). O cache é preenchido ainda
+        # com as travas, senão um salvar no meio do caminho ficaria de fora dele.
+        with self.trava_banco:
+            linhas = [list(linha) for linha in self.conexao.execute(
+                "SELECT nome, pontos, tempo FROM recordes WHERE chave = ? ORDER BY pontos DESC, id LIMIT ?",
+                (chave, max(n, TAMANHO_CACHE_TOP)))]
+            with self.trava:
+                linhas += [[nome, pontos, tempo] for c, nome, pontos, tempo, _ in self.pendentes if c == chave]
+                # sort estável: os pendentes chegaram depois e ficam atrás nos empates.
+                linhas.sort(key=lambda linha: -linha[1])
+                self.cache_top[chave] = [list(linha) for linha in linhas[:TAMANHO_CACHE_TOP]]
+        return linhas[:n]
+
+    # Posição (1 = primeiro) que uma pontuação ocupa; empates ficam atrás de quem já estava lá.
+    def posicao(self, chave, pontos):
+        with self.trava_banco:
+            acima = self.conexao.execute(
+                "SELECT COUNT(*) FROM recordes WHERE chave = ? AND pontos >= ?", (chave, pontos)).fetchone()[0]
+            with self.trava:
+                acima += sum(1 for linha in self.pendentes if linha[0] == chave and linha[2] >= pontos)
+        return acima + 1
+
+    def total(self, chave):
+        with self.trava_banco:
+            total = self.conexao.execute("SELECT COUNT(*) FROM recordes WHERE chave = ?", (chave,)).fetchone()[0]
+            with self.trava:
+                total += sum(1 for linha in self.pendentes if linha[0] == chave)
+        return total
+
+    def fechar(self):
+        if self.escritor.is_alive():
+            self.fila.put(None)
+            self.escritor.join()
+        self.conexao.close()
@@ -0,0 +1,228 @@
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from nucleo_grafo import (
+    DIFICULDADES, GERADORES, INFINITO, ESTADO_JOGANDO, ESTADO_INPUT_NOME, ESTADO_DERROTA, NucleoJogo, preparar_fase,
+)
+from banco_fases import abrir_banco
+
+# [BLOCO DO REPLAY (a partida gravada: fase, cliques e o resultado declarado)]
+# Layout (little-endian):
+#   cabeçalho   MAGICO, versão, modo, dificuldade, gerador da fase, semente, pontos e tempo (ms)
+#               declarados, nº de cliques
+#   cliques     n uint32 com os ms desde o início da fase, depois n pares float32 (x, y) no mundo
+# A fase sai da semente e os cliques são o que NucleoJogo.clicar gravou, então reproduzir os cliques
+# num NucleoJogo sem janela refaz a partida inteira e a pontuação tem que bater com a declarada.
+# A mesma semente só dá a mesma fase no mesmo gerador, então o gerador também tem que bater.
+
+MAGICO = b"GRAFORPL"
+VERSAO = 2
+MODOS = ("BFS", "DFS")
+EXTENSAO_REPLAY = ".rpl"
+CABECALHO = struct.Struct("<8sBB16sBxqiII")
+LIMITE_FASES_CACHE = 8
+LOTE_PROCESSOS = 64  # replays por tarefa enviada a cada processo
+
+
+class Replay:
+    __slots__ = ("modo", "dificuldade", "gerador", "semente", "pontos", "tempo_ms", "cliques_ms", "cliques_xy")
+
+    def __init__(self, modo, dificuldade, gerador, semente, pontos, tempo_ms, cliques_ms, cliques_xy):
+        self.modo = modo
+        self.dificuldade = dificuldade
+        self.gerador = gerador
+        self.semente = semente
+        self.pontos = pontos
+        self.tempo_ms = tempo_ms
+        self.cliques_ms = cliques_ms
+        self.cliques_xy = cliques_xy
+
+    @property
+    def chave(self):
+        return f"{self.modo}_{self.dificuldade}"
+
+    @classmethod
+    def de_partida(cls, jogo):
+        return cls(jogo.modo, jogo.dificuldade_atual, jogo.gerador, jogo.semente, jogo.pontuacao_final,
+                   round(jogo.tempo_final * 1000), jogo.cliques_ms, jogo.cliques_xy)
+
+    def para_bytes(self):
+        cabecalho = CABECALHO.pack(MAGICO, VERSAO, MODOS.index(self.modo), self.dificuldade.encode("utf-8"),
+                                   self.gerador, self.semente, self.pontos, self.tempo_ms, len(self.cliques_ms))
+        return cabecalho + self.cliques_ms.tobytes() + self.cliques_xy.tobytes()
+
+    @classmethod
+    def de_bytes(cls, dados):
+        if len(dados) < CABECALHO.size:
+            raise ValueError("replay truncado")
+        magico, versao, modo, dificuldade, gerador, semente, pontos, tempo_ms, n = CABECALHO.unpack_from(dados)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError(f"não é um replay v{VERSAO}")
+        if modo >= len(MODOS) or gerador >= len(GERADORES) or len(dados) != CABECALHO.size + 12 * n:
+            raise ValueError("replay corrompido")
+        cliques_ms, cliques_xy = array('I'), array('f')
+        cliques_ms.frombytes(dados[CABECALHO.size:CABECALHO.size + 4 * n])
+        cliques_xy.frombytes(dados[CABECALHO.size + 4 * n:])
+        if not all(map(math.isfinite, cliques_xy)):
+            raise ValueError("clique com coordenada inválida")
+        return cls(MODOS[modo], dificuldade.rstrip(b"\0").decode("utf-8"), gerador, semente, pontos, tempo_ms,
+                   cliques_ms, cliques_xy)
+
+
+# [BLOCO DO VERIFICADOR (refaz a partida sem janela e recalcula a pontuação)]
+
+# Fica no lugar do BancoFases do núcleo: a mesma fase aparece em muitos replays (desafio diário,
+# --semente), então as últimas ficam em memória e só voltam ao estado inicial entre um e outro.
+class CacheFases:
+    def __init__(self, banco=None):
+        self.banco = banco
+        self.fases = OrderedDict()
+
+    def buscar(self, dificuldade, modo, semente):
+        chave = (dificuldade, modo, semente)
+        fase = self.fases.get(chave)
+        if fase is None:
+            fase = self.banco.buscar(dificuldade, modo, semente) if self.banco else None
+            if fase is None:
+                fase = preparar_fase(DIFICULDADES[dificuldade], modo, semente)
+            self.fases[chave] = fase
+            if len(self.fases) > LIMITE_FASES_CACHE:
+                self.fases.popitem(last=False)
+        else:
+            self.fases.move_to_end(chave)
+            fase.grafo.resetar_estado()
+        return fase
+
+
+# O relógio é o instante do clique sendo reproduzido.
+class NucleoReplay(NucleoJogo):
+    def __init__(self, fases):
+        self.agora = 0
+        super().__init__()
+        self.banco = fases
+
+    def relogio(self):
+        return self.agora
+
+
+_fases = None  # uma por processo de verificação
+
+def verificar(dados):
+    global _fases
+    resultado = {"valido": False, "chave": None, "pontos": None, "tempo": None, "motivo": None}
+    try:
+        replay = Replay.de_bytes(dados)
+    except (ValueError, UnicodeDecodeError) as erro:
+        resultado["motivo"] = str(erro)
+        return resultado
+    resultado["chave"] = replay.chave
+    if replay.dificuldade not in DIFICULDADES and replay.dificuldade != INFINITO:
+        resultado["motivo"] = f"dificuldade desconhecida: {replay.dificuldade}"
+        return resultado
+    if any(a > b for a, b in zip(replay.cliques_ms, replay.cliques_ms[1:])):
+        resultado["motivo"] = "cliques fora de ordem"
+        return resultado
+
+    if _fases is None:
+        _fases = CacheFases(abrir_banco())
+    jogo = NucleoReplay(_fases)
+    jogo.modo = replay.modo
+    jogo.iniciar_nivel(replay.dificuldade, replay.semente)
+    if jogo.gerador != replay.gerador:
+        resultado["motivo"] = (f"fase do gerador {GERADORES[replay.gerador]}, "
+                               f"esta versão usa o {GERADORES[jogo.gerador]}")
+        return resultado
+    xy = replay.cliques_xy
+    for i, ms in enumerate(replay.cliques_ms):
+        if jogo.estado != ESTADO_JOGANDO:
+            resultado["motivo"] = f"{len(replay.cliques_ms) - i} clique(s) depois do fim da partida"
+            return resultado
+        jogo.agora = ms
+        jogo.clicar((xy[2 * i], xy[2 * i + 1]))
+
+    if jogo.estado != ESTADO_INPUT_NOME:
+        resultado["motivo"] = "derrota" if jogo.estado == ESTADO_DERROTA else "partida não terminou"
+        return resultado
+    resultado["pontos"], resultado["tempo"] = jogo.pontuacao_final, jogo.tempo_final
+    if (jogo.pontuacao_final, round(jogo.tempo_final * 1000)) != (replay.pontos, replay.tempo_ms):
+        resultado["motivo"] = (f"declarado {replay.pontos} pts em {replay.tempo_ms / 1000:.3f}s, "
+                               f"replay dá {jogo.pontuacao_final} pts em {jogo.tempo_final:.3f}s")
+        return resultado
+    resultado["valido"] = True
+    return resultado
+
+
+# Modo, dificuldade, gerador e semente direto do cabeçalho, sem decodificar: replays da mesma fase ficam juntos.
+def fase_replay(dados):
+    return dados[9:36]
+
+
+# Um replay que derruba o verificador é recusado sozinho; os outros do lote seguem.
+def verificar_protegido(dados):
+    try:
+        return verificar(dados)
+    except Exception as erro:
+        return {"valido": False, "chave": None, "pontos": None, "tempo": None, "motivo": f"falha ao refazer: {erro!r}"}
+
+
+def verificar_varios(replays):
+    return [verificar_protegido(dados) for dados in replays]
+
+
+# Replays da mesma fase vão juntos para o mesmo processo (e aproveitam o CacheFases); o resultado
+# volta na ordem da entrada.
+def verificar_lote(replays, processos=None):
+    ordem = sorted(range(len(replays)), key=lambda i: fase_replay(replays[i]))
+    resultados = [None] * len(replays)
+    with ProcessPoolExecutor(processos) as executor:
+        for i, resultado in zip(ordem, executor.map(verificar_protegido, [replays[i] for i in ordem],
+                                                    chunksize=LOTE_PROCESSOS)):
+            resultados[i] = resultado
+    return resultados
+
+
+def listar_replays(caminhos):
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            for nome in sorted(os.listdir(caminho)):
+                if nome.endswith(EXTENSAO_REPLAY):
+                    yield os.path.join(caminho, nome)
+        else:
+            yield caminho
+
+
+# Uso: python replay.py replays/ --processos 4
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refaz replays sem janela e confere a pontuação declarada.")
+    parser.add_argument("replays", nargs="+", help=f"arquivos {EXTENSAO_REPLAY} ou pastas com eles")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    caminhos = list(listar_replays(args.replays))
+    replays = []
+    for caminho in caminhos:
+        with open(caminho, "rb") as f:
+            replays.append(f.read())
+
+    comeco = time.perf_counter()
+    resultados = verificar_lote(replays, args.processos)
+    decorrido = time.perf_counter() - comeco
+    recusados = 0
+    for caminho, resultado in zip(caminhos, resultados):
+        if not resultado["valido"]:
+            recusados += 1
+            print(f"{caminho}: {resultado['motivo']}")
+    print(f"{len(replays)} replay(s) em {decorrido:.2f}s ({len(replays) / max(decorrido, 1e-9):,.0f}/s): "
+          f"{len(replays) - recusados} válido(s), {recusados} recusado(s)")
+    return 1 if recusados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
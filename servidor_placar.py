@@ -0,0 +1,421 @@
+import argparse
+import asyncio
+import base64
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import warnings
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from nucleo_grafo import DIFICULDADES, INFINITO
+from recordes import ESQUEMA, conectar
+from replay import Replay, fase_replay, verificar_varios
+
+# [BLOCO DO SERVIDOR DE PLACAR (asyncio, um objeto JSON por linha, gravação em lote)]
+# Cada linha enviada é um pedido com "id" e "op"; a resposta volta numa linha com o mesmo "id".
+#   {"id": 1, "op": "salvar", "chave": "BFS_Normal", "nome": "ana", "pontos": 4321, "tempo": 12.5}
+#       -> {"id": 1, "chave": "BFS_Normal", "posicao": 3}
+#   {"id": 2, "op": "top", "chave": "BFS_Normal", "n": 5}
+#       -> {"id": 2, "chave": "BFS_Normal", "top": [[nome, pontos, tempo], ...], "total": 812}
+# Todas as respostas saem do índice em memória, que é carregado do SQLite na subida. As partidas
+# novas entram no índice na hora e vão para o disco em lotes (uma transação a cada
+# INTERVALO_ESCRITA), numa thread própria para o laço de eventos nunca esperar o disco.
+# Um "salvar" com "replay" (os bytes de replay.py em base64) só entra no placar depois de refeito
+# num processo de verificação, e com a pontuação recalculada. Com --exigir-replay, todo envio precisa
+# de um. Os replays também andam em lotes: o que chega em INTERVALO_AUDITORIA vai junto para os
+# processos, agrupado por fase para o cache de fases de cada processo ser aproveitado.
+
+PORTA_PADRAO = 8765
+ARQUIVO_PLACAR_SERVIDOR = "placar_servidor.db"
+TAMANHO_TOPO = 100
+INTERVALO_ESCRITA = 0.05
+INTERVALO_AUDITORIA = 0.02
+LOTE_AUDITORIA = 64
+LIMITE_BUFFER_SAIDA = 1 << 16
+LIMITE_LINHA = 1 << 22  # um replay de partida longa em base64 passa fácil dos 64 KB padrão do asyncio
+ESPERA_RECONEXAO, ESPERA_MAXIMA = 0.5, 10.0
+PONTOS_MIN, PONTOS_MAX = -(1 << 63), (1 << 63) - 1  # INTEGER do SQLite
+
+
+# O json.loads aceita NaN, Infinity e inteiros de qualquer tamanho; nada disso entra no índice.
+def validar_partida(pontos, tempo):
+    if isinstance(pontos, bool) or not isinstance(pontos, int) or not PONTOS_MIN <= pontos <= PONTOS_MAX:
+        raise ValueError(f"pontos precisa ser um inteiro de 64 bits: {pontos!r}")
+    tempo = float(tempo)
+    if not math.isfinite(tempo) or tempo < 0:
+        raise ValueError(f"tempo inválido: {tempo!r}")
+    return pontos, tempo
+
+
+# Por chave: os pontos de todas as partidas (negados, em ordem crescente, para a posição sair de
+# um bisect) e as TAMANHO_TOPO melhores entradas completas. Empates ficam atrás de quem chegou antes.
+class IndicePlacar:
+    def __init__(self):
+        self.pontos = {}
+        self.topo = {}
+
+    def inserir(self, chave, nome, pontos, tempo):
+        negativos = self.pontos.setdefault(chave, [])
+        posicao = bisect_right(negativos, -pontos)
+        negativos.insert(posicao, -pontos)
+        if posicao < TAMANHO_TOPO:
+            topo = self.topo.setdefault(chave, [])
+            topo.insert(posicao, [nome, pontos, tempo])
+            del topo[TAMANHO_TOPO:]
+        return posicao + 1
+
+    def top(self, chave, n):
+        return self.topo.get(chave, [])[:n]
+
+    def total(self, chave):
+        return len(self.pontos.get(chave, ()))
+
+
+class ServidorPlacar:
+    def __init__(self, caminho=ARQUIVO_PLACAR_SERVIDOR, exigir_replay=False, processos=None):
+        self.caminho = caminho
+        self.exigir_replay = exigir_replay
+        self.indice = IndicePlacar()
+        self.pendentes = []
+        self.auditoria = []
+        # Uma thread só: a conexão SQLite fica sempre na mesma thread e os lotes saem em ordem.
+        self.gravador = ThreadPoolExecutor(1, thread_name_prefix="placar")
+        # Os processos só sobem no primeiro replay recebido.
+        self.processos = processos or os.cpu_count() or 1
+        self.auditor = ProcessPoolExecutor(self.processos, mp_context=multiprocessing.get_context("spawn"))
+        self.conexao = None
+        self.servidor = None
+        self.tarefas = set()
+
+    def abrir_banco(self):
+        self.conexao = conectar(self.caminho)
+        self.conexao.executescript(ESQUEMA)
+        return self.conexao.execute("SELECT chave, nome, pontos, tempo FROM recordes ORDER BY id").fetchall()
+
+    def gravar(self, lote):
+        try:
+            with self.conexao:
+                self.conexao.executemany(
+                    "INSERT INTO recordes (chave, nome, pontos, tempo, data) VALUES (?, ?, ?, ?, ?)", lote)
+        except (sqlite3.Error, OverflowError) as erro:
+            warnings.warn(f"Falha ao gravar {len(lote)} recorde(s): {erro}")
+
+    async def iniciar(self, host, porta):
+        loop = asyncio.get_running_loop()
+        for linha in await loop.run_in_executor(self.gravador, self.abrir_banco):
+            self.indice.inserir(*linha)
+        self.acordar = asyncio.Event()
+        self.acordar_auditoria = asyncio.Event()
+        self.tarefas.add(asyncio.create_task(self.laco_escrita()))
+        self.tarefas.add(asyncio.create_task(self.laco_auditoria()))
+        self.servidor = await asyncio.start_server(self.atender, host, porta, limit=LIMITE_LINHA)
+        return self.servidor
+
+    def registrar(self, chave, nome, pontos, tempo):
+        self.pendentes.append((chave, nome, pontos, tempo, time.time()))
+        self.acordar.set()
+        return self.indice.inserir(chave, nome, pontos, tempo)
+
+    async def laco_escrita(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.acordar.wait()
+            await asyncio.sleep(INTERVALO_ESCRITA)  # o que chegar nesse meio-tempo vai no mesmo lote
+            self.acordar.clear()
+            lote, self.pendentes = self.pendentes, []
+            # Um lote que falha não pode derrubar o laço: os seguintes ainda precisam chegar ao disco.
+            try:
+                await loop.run_in_executor(self.gravador, self.gravar, lote)
+            except Exception as erro:
+                warnings.warn(f"Falha ao gravar {len(lote)} recorde(s): {erro!r}")
+
+    async def laco_auditoria(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.acordar_auditoria.wait()
+            await asyncio.sleep(INTERVALO_AUDITORIA)
+            self.acordar_auditoria.clear()
+            lote, self.auditoria = self.auditoria, []
+            lote.sort(key=lambda item: fase_replay(item[0]))
+            tamanho = max(1, min(LOTE_AUDITORIA, -(-len(lote) // self.processos)))
+            partes = [lote[i:i + tamanho] for i in range(0, len(lote), tamanho)]
+            resultados = await asyncio.gather(
+                *(loop.run_in_executor(self.auditor, verificar_varios, [dados for dados, _ in parte]) for parte in partes),
+                return_exceptions=True)
+            for parte, resultado in zip(partes, resultados):
+                if isinstance(resultado, BaseException):
+                    warnings.warn(f"Falha ao verificar {len(parte)} replay(s): {resultado!r}")
+                    resultado = [{"valido": False, "motivo": "verificador indisponível"}] * len(parte)
+                for (_, futuro), r in zip(parte, resultado):
+                    if not futuro.done():
+                        futuro.set_result(r)
+
+    async def auditar(self, id, chave, nome, dados):
+        futuro = asyncio.get_running_loop().create_future()
+        self.auditoria.append((dados, futuro))
+        self.acordar_auditoria.set()
+        resultado = await futuro
+        if not resultado["valido"]:
+            return {"id": id, "erro": f"replay recusado: {resultado['motivo']}"}
+        if resultado["chave"] != chave:
+            return {"id": id, "erro": f"replay recusado: é de {resultado['chave']}"}
+        return {"id": id, "chave": chave, "posicao": self.registrar(chave, nome, resultado["pontos"], resultado["tempo"])}
+
+    async def responder_depois(self, resposta, escritor):
+        resposta = await resposta
+        if not escritor.is_closing():
+            escritor.write(json.dumps(resposta).encode() + b"\n")
+
+    async def fechar(self):
+        if self.servidor:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        for tarefa in self.tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self.tarefas, return_exceptions=True)
+        self.auditor.shutdown(cancel_futures=True)
+        loop = asyncio.get_running_loop()
+        lote, self.pendentes = self.pendentes, []
+        if lote:
+            await loop.run_in_executor(self.gravador, self.gravar, lote)
+        if self.conexao:
+            await loop.run_in_executor(self.gravador, self.conexao.close)
+        self.gravador.shutdown()
+
+    async def atender(self, leitor, escritor):
+        try:
+            while linha := await leitor.readline():
+                resposta = self.responder(linha)
+                if isinstance(resposta, dict):
+                    escritor.write(json.dumps(resposta).encode() + b"\n")
+                else:  # replay em verificação: a resposta sai quando ele voltar dos processos
+                    tarefa = asyncio.create_task(self.responder_depois(resposta, escritor))
+                    self.tarefas.add(tarefa)
+                    tarefa.add_done_callback(self.tarefas.discard)
+                # Respostas pequenas se acumulam no buffer; só espera o socket quando ele enche.
+                if escritor.transport.get_write_buffer_size() > LIMITE_BUFFER_SAIDA:
+                    await escritor.drain()
+        except (ConnectionError, ValueError):  # ValueError: linha maior que o limite do leitor
+            pass
+        finally:
+            escritor.close()
+
+    def responder(self, linha):
+        id = None
+        try:
+            pedido = json.loads(linha)
+            id = pedido.get("id")
+            op, chave = pedido["op"], str(pedido["chave"])[:64]
+            if op == "salvar":
+                nome = str(pedido["nome"])[:32]
+                if pedido.get("replay"):
+                    dados = base64.b64decode(pedido["replay"], validate=True)
+                    return self.auditar(id, chave, nome, dados)
+                if self.exigir_replay:
+                    return {"id": id, "erro": "este placar só aceita envios com replay"}
+                posicao = self.registrar(chave, nome, *validar_partida(pedido["pontos"], pedido["tempo"]))
+                return {"id": id, "chave": chave, "posicao": posicao}
+            if op == "top":
+                n = max(0, min(int(pedido.get("n", 5)), TAMANHO_TOPO))
+                return {"id": id, "chave": chave, "top": self.indice.top(chave, n), "total": self.indice.total(chave)}
+            return {"id": id, "erro": f"operação desconhecida: {op}"}
+        except (ValueError, KeyError, TypeError, AttributeError, OverflowError) as erro:
+            return {"id": id, "erro": f"pedido inválido: {erro}"}
+
+
+async def servir(host, porta, caminho, exigir_replay=False, processos=None):
+    placar = ServidorPlacar(caminho, exigir_replay, processos)
+    servidor = await placar.iniciar(host, porta)
+    print(f"placar em {host}:{porta} ({sum(map(len, placar.indice.pontos.values()))} partidas carregadas)")
+    # SIGTERM também passa pelo fechar (e grava o último lote); no Windows só há o Ctrl+C.
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await placar.fechar()
+
+# [BLOCO DO CLIENTE (thread com laço asyncio próprio; o jogo só enfileira pedidos e lê respostas)]
+# Uma conexão persistente por jogo. enviar/pedir_top nunca bloqueiam: os pedidos entram numa fila
+# atendida pela thread do cliente, e as respostas de top ficam em `tops` para o front end ler.
+# Se a conexão cair, os pedidos ainda na fila esperam a reconexão; os já enviados sem resposta
+# são descartados (o jogo guarda a partida no placar local de qualquer jeito).
+
+class ClientePlacar:
+    def __init__(self, host, porta=PORTA_PADRAO, ao_receber=None):
+        self.host = host
+        self.porta = porta
+        self.ao_receber = ao_receber  # chamado na thread do cliente a cada resposta
+        self.tops = {}
+        self.conectado = False
+        self.proximo_id = 0
+        self.fila = asyncio.Queue()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="placar", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.laco(), self.loop)
+
+    def pedir(self, pedido):
+        self.proximo_id += 1
+        pedido["id"] = self.proximo_id
+        self.loop.call_soon_threadsafe(self.fila.put_nowait, pedido)
+
+    def enviar(self, chave, nome, pontos, tempo, replay=None):
+        pedido = {"op": "salvar", "chave": chave, "nome": nome, "pontos": int(pontos), "tempo": float(tempo)}
+        if replay:
+            pedido["replay"] = base64.b64encode(replay).decode("ascii")
+        self.pedir(pedido)
+
+    def pedir_top(self, chave, n=5):
+        self.pedir({"op": "top", "chave": chave, "n": n})
+
+    async def laco(self):
+        espera = ESPERA_RECONEXAO
+        while True:
+            try:
+                leitor, escritor = await asyncio.open_connection(self.host, self.porta)
+            except OSError:
+                await asyncio.sleep(espera)
+                espera = min(2 * espera, ESPERA_MAXIMA)
+                continue
+            espera = ESPERA_RECONEXAO
+            self.conectado = True
+            leitura = asyncio.create_task(self.ler(leitor))
+            try:
+                while True:
+                    obter = asyncio.ensure_future(self.fila.get())
+                    await asyncio.wait({obter, leitura}, return_when=asyncio.FIRST_COMPLETED)
+                    if leitura.done():
+                        if obter.done():
+                            self.fila.put_nowait(obter.result())
+                        obter.cancel()
+                        break
+                    escritor.write(json.dumps(obter.result()).encode() + b"\n")
+                    await escritor.drain()
+            except ConnectionError:
+                pass
+            finally:
+                self.conectado = False
+                leitura.cancel()
+                escritor.close()
+
+    async def ler(self, leitor):
+        try:
+            while linha := await leitor.readline():
+                try:
+                    resposta = json.loads(linha)
+                except ValueError:
+                    continue
+                if "top" in resposta:
+                    self.tops[resposta["chave"]] = [tuple(entrada) for entrada in resposta["top"]]
+                if self.ao_receber:
+                    self.ao_receber(resposta)
+        except (ConnectionError, ValueError):
+            pass
+
+    # Dá até `limite` segundos para a fila ser enviada antes de parar a thread.
+    def fechar(self, limite=1.0):
+        async def esvaziar():
+            prazo = time.monotonic() + limite
+            while self.conectado and not self.fila.empty() and time.monotonic() < prazo:
+                await asyncio.sleep(0.01)
+            tarefas = asyncio.all_tasks() - {asyncio.current_task()}
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(esvaziar(), self.loop).result(limite + 1)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+
+# [BLOCO DO GERADOR DE CARGA (muitas conexões mandando partidas em sequência, sem esperar resposta)]
+# Com --replays, cada envio leva um dos replays dados (e mede o caminho com verificação).
+
+async def conexao_carga(host, porta, envios, chaves, replays, rng):
+    leitor, escritor = await asyncio.open_connection(host, porta, limit=LIMITE_LINHA)
+    for i in range(envios):
+        pedido = {"id": i, "op": "salvar", "chave": rng.choice(chaves), "nome": f"carga{i % 1000}",
+                  "pontos": rng.randint(0, 15000), "tempo": round(rng.uniform(5, 300), 2)}
+        if replays:
+            pedido["chave"], pedido["pontos"], pedido["tempo"], pedido["replay"] = rng.choice(replays)
+        escritor.write(json.dumps(pedido).encode() + b"\n")
+        if i % 256 == 255:
+            await escritor.drain()
+    await escritor.drain()
+    recebidas = erros = 0
+    while recebidas < envios:
+        resposta = json.loads(await leitor.readline())
+        recebidas += 1
+        erros += "erro" in resposta
+    escritor.close()
+    return erros
+
+
+async def carga(host, porta, conexoes, envios, semente, arquivos_replay=()):
+    chaves = [f"{modo}_{nivel}" for modo in ("BFS", "DFS") for nivel in (*DIFICULDADES, INFINITO)]
+    replays = []
+    for caminho in arquivos_replay:
+        with open(caminho, "rb") as f:
+            dados = f.read()
+        replay = Replay.de_bytes(dados)
+        replays.append((replay.chave, replay.pontos, replay.tempo_ms / 1000, base64.b64encode(dados).decode("ascii")))
+    comeco = time.perf_counter()
+    erros = await asyncio.gather(*(conexao_carga(host, porta, envios // conexoes, chaves, replays,
+                                                 random.Random(semente + c))
+                                   for c in range(conexoes)))
+    decorrido = time.perf_counter() - comeco
+    total = conexoes * (envios // conexoes)
+    print(f"{total} envios em {decorrido:.2f}s por {conexoes} conexões: {total / decorrido:,.0f} envios/s, "
+          f"{sum(erros)} erro(s)")
+    return sum(erros)
+
+
+# Uso: python servidor_placar.py servir --host 0.0.0.0
+#      python servidor_placar.py carga --conexoes 16 --envios 50000
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de placar compartilhado (asyncio) e gerador de carga.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    servir_ = comandos.add_parser("servir", help="sobe o servidor")
+    servir_.add_argument("--host", default="127.0.0.1")
+    servir_.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    servir_.add_argument("--banco", default=ARQUIVO_PLACAR_SERVIDOR)
+    servir_.add_argument("--exigir-replay", action="store_true", help="recusa envios sem replay")
+    servir_.add_argument("--processos", type=int, help="processos que refazem os replays (padrão: um por núcleo)")
+    carga_ = comandos.add_parser("carga", help="mede quantos envios por segundo o servidor aguenta")
+    carga_.add_argument("--host", default="127.0.0.1")
+    carga_.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    carga_.add_argument("--conexoes", type=int, default=8)
+    carga_.add_argument("--envios", type=int, default=20000, help="total, dividido entre as conexões")
+    carga_.add_argument("--semente", type=int, default=0)
+    carga_.add_argument("--replays", nargs="+", default=(), metavar="ARQUIVO", help="envia estes replays junto")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando == "servir":
+            asyncio.run(servir(args.host, args.porta, args.banco, args.exigir_replay, args.processos))
+        else:
+            return 1 if asyncio.run(carga(args.host, args.porta, args.conexoes, args.envios, args.semente, args.replays)) else 0
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except OSError as erro:
+        print(f"erro: {erro}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
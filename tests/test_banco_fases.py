@@ -0,0 +1,68 @@
+import argparse
+
+import pytest
+
+from banco_fases import (
+    CABECALHO, MAGICO, SEMENTE_MAX, SEMENTE_MIN, VERSAO, BancoFases, abrir_banco, gravar_banco, ler_semente,
+)
+from nucleo_grafo import DIFICULDADES, GERADOR_CLASSICO, GERADOR_VETORIZADO, GradeEspacial, preparar_fase
+
+
+def conferir_fase(lida, esperada):
+    assert (lida.largura_mundo, lida.altura_mundo) == (esperada.largura_mundo, esperada.altura_mundo)
+    assert (lida.semente, lida.gerador) == (esperada.semente, esperada.gerador)
+    for campo in ("xs", "ys", "arestas", "inicio", "adj"):
+        assert list(getattr(lida.grafo, campo)) == list(getattr(esperada.grafo, campo)), campo
+    # A grade lida do banco responde como uma montada do zero sobre o mesmo grafo.
+    grade = GradeEspacial(esperada.grafo)
+    largura, altura = esperada.largura_mundo, esperada.altura_mundo
+    for x0, y0, x1, y1 in ((0, 0, largura, altura), (0, 0, largura // 3, altura // 2),
+                           (largura // 2, altura // 3, largura, altura)):
+        assert sorted(lida.indice.nos_em(x0, y0, x1, y1)) == sorted(grade.nos_em(x0, y0, x1, y1))
+        assert sorted(lida.indice.arestas_em(x0, y0, x1, y1)) == sorted(grade.arestas_em(x0, y0, x1, y1))
+
+
+def gravar_e_conferir(caminho, niveis, sementes):
+    fases = [(nome, modo, preparar_fase(DIFICULDADES[nome], modo, semente))
+             for nome in niveis for modo in ("BFS", "DFS") for semente in sementes]
+    gravar_banco(str(caminho), fases)
+    with BancoFases(str(caminho)) as banco:
+        assert len(banco) == len(fases)
+        for nome, modo, fase in fases:
+            assert (nome, modo, fase.semente) in banco
+            conferir_fase(banco.buscar(nome, modo, fase.semente), fase)
+        assert banco.buscar(niveis[0], "BFS", 999_999) is None
+    return fases
+
+
+def test_banco_devolve_as_fases_gravadas(tmp_path):
+    fases = gravar_e_conferir(tmp_path / "banco.bin", ["Noob", "Normal", "Hacker"], [0, 3, 41])
+    assert {fase.gerador for _, _, fase in fases} == {GERADOR_CLASSICO}
+
+
+def test_sementes_nos_extremos_de_64_bits(tmp_path):
+    gravar_e_conferir(tmp_path / "banco.bin", ["Noob", "Fácil"], [SEMENTE_MIN, -1, 1 << 32, SEMENTE_MAX])
+
+
+def test_semente_fora_de_64_bits_e_recusada_no_argumento():
+    assert ler_semente(str(SEMENTE_MIN)) == SEMENTE_MIN
+    for texto in (str(SEMENTE_MAX + 1), str(SEMENTE_MIN - 1)):
+        with pytest.raises(argparse.ArgumentTypeError):
+            ler_semente(texto)
+
+
+def test_banco_com_gerador_vetorizado(tmp_path):
+    pytest.importorskip("numpy")
+    fases = gravar_e_conferir(tmp_path / "banco.bin", ["Mega"], [0, 5])
+    assert {fase.gerador for _, _, fase in fases} == {GERADOR_VETORIZADO}
+
+
+def test_banco_de_outra_versao_e_ignorado(tmp_path):
+    caminho = tmp_path / "antigo.bin"
+    caminho.write_bytes(CABECALHO.pack(MAGICO, VERSAO - 1, 0))
+    with pytest.warns(UserWarning, match="Banco de fases ignorado"):
+        assert abrir_banco(str(caminho)) is None
+    caminho.write_bytes(b"GRAFO")
+    with pytest.warns(UserWarning):
+        assert abrir_banco(str(caminho)) is None
+    assert abrir_banco(str(tmp_path / "nao_existe.bin")) is None
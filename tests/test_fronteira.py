@@ -0,0 +1,96 @@
+import itertools
+
+import pytest
+
+from nucleo_grafo import DIFICULDADES, Fronteira, GrafoCompacto, percorrer, preparar_fase
+
+# Referência por força bruta: todas as ordens que uma BFS/DFS de verdade produz a partir do nó 0,
+# variando a ordem dos vizinhos de todas as formas. A Fronteira tem que aceitar, depois de cada
+# prefixo, exatamente os nós que continuam alguma dessas ordens.
+
+
+def grafo_de(n, arestas):
+    grafo = GrafoCompacto()
+    for i in range(n):
+        grafo.add_node(100 * i, 0)
+    for u, v in arestas:
+        grafo.add_edge(u, v)
+    grafo.compilar()
+    return grafo
+
+
+def ordens_bfs(grafo):
+    ordens = set()
+
+    def expandir(ordem, fila):
+        if not fila:
+            ordens.add(tuple(ordem))
+            return
+        novos = [v for v in grafo.vizinhos(fila[0]) if v not in ordem]
+        for permutacao in itertools.permutations(novos):
+            expandir(ordem + list(permutacao), fila[1:] + list(permutacao))
+
+    expandir([0], [0])
+    return ordens
+
+
+def ordens_dfs(grafo):
+    ordens = set()
+
+    def descer(ordem, pilha):
+        while pilha and all(v in ordem for v in grafo.vizinhos(pilha[-1])):
+            pilha = pilha[:-1]
+        if not pilha:
+            ordens.add(tuple(ordem))
+            return
+        for v in grafo.vizinhos(pilha[-1]):
+            if v not in ordem:
+                descer(ordem + [v], pilha + [v])
+
+    descer([0], [0])
+    return ordens
+
+
+def conferir(grafo, modo):
+    ordens = (ordens_bfs if modo == "BFS" else ordens_dfs)(grafo)
+    assert all(len(ordem) == len(grafo) for ordem in ordens)
+    assert (0, *percorrer(grafo, modo)) in ordens
+
+    proximos = {}
+    for ordem in ordens:
+        for k in range(1, len(ordem) + 1):
+            proximos.setdefault(ordem[:k], set())
+            if k < len(ordem):
+                proximos[ordem[:k]].add(ordem[k])
+
+    for prefixo, esperados in proximos.items():
+        grafo.resetar_estado()
+        fronteira = Fronteira(grafo, modo)
+        for u in prefixo:
+            fronteira.visitar(u)
+        assert {v for v in range(len(grafo)) if fronteira.aceita(v)} == esperados, prefixo
+        assert (fronteira.expandindo() is None) == (not esperados)
+
+
+GRAFOS = {
+    "caminho": (4, [(0, 1), (1, 2), (2, 3)]),
+    "estrela": (5, [(0, 1), (0, 2), (0, 3), (0, 4)]),
+    "triangulo": (3, [(0, 1), (1, 2), (2, 0)]),
+    "quadrado": (4, [(0, 1), (1, 2), (2, 3), (3, 0)]),
+    "losango_com_cauda": (6, [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 5), (2, 5)]),
+    "completo": (5, [(u, v) for u in range(5) for v in range(u + 1, 5)]),
+    "arvore_com_atalhos": (8, [(0, 1), (0, 2), (1, 3), (1, 4), (2, 5), (2, 6), (5, 7), (4, 5), (3, 7)]),
+}
+
+
+@pytest.mark.parametrize("modo", ["BFS", "DFS"])
+@pytest.mark.parametrize("nome", list(GRAFOS))
+def test_fronteira_aceita_as_ordens_legais(nome, modo):
+    conferir(grafo_de(*GRAFOS[nome]), modo)
+
+
+@pytest.mark.parametrize("modo", ["BFS", "DFS"])
+@pytest.mark.parametrize("dificuldade", ["Noob", "Fácil"])
+@pytest.mark.parametrize("semente", range(8))
+def test_fronteira_nas_fases_geradas(dificuldade, modo, semente):
+    conferir(preparar_fase(DIFICULDADES[dificuldade], modo, semente).grafo, modo)
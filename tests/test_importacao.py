@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# O núcleo abre sem numpy nem a maquinaria de processos; eles só entram quando uma fase precisa.
+def test_importar_o_nucleo_nao_carrega_numpy_nem_processos():
+    codigo = ("import sys, nucleo_grafo; "
+              "print(sorted(m for m in ('numpy', 'multiprocessing', 'concurrent.futures') if m in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == "[]"
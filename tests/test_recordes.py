@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+
+import recordes
+from recordes import ArmazemRecordes
+
+
+def abrir(tmp_path, **kwargs):
+    return ArmazemRecordes(str(tmp_path / "recordes.db"), **kwargs)
+
+
+def salvar_todos(armazem, chave, entradas):
+    for nome, pontos in entradas:
+        armazem.salvar(chave, nome, pontos, 1.0)
+
+
+# Várias threads salvando enquanto o jogo consulta; depois de fechar e reabrir nada pode faltar,
+# nem sobrar em dobro, e a ordem no banco tem que bater com a das consultas.
+def test_salvar_concorrente_fecha_e_reabre(tmp_path):
+    armazem = abrir(tmp_path)
+    por_thread, threads = 500, 4
+
+    def trabalhar(t):
+        for i in range(por_thread):
+            armazem.salvar("Normal", f"T{t}", i * threads + t, float(i))
+
+    trabalhadores = [threading.Thread(target=trabalhar, args=(t,)) for t in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    vistos = []
+    while any(trabalhador.is_alive() for trabalhador in trabalhadores):
+        vistos.append(armazem.total("Normal"))
+        top = armazem.top("Normal", 5)
+        assert [linha[1] for linha in top] == sorted((linha[1] for linha in top), reverse=True)
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    assert vistos == sorted(vistos)
+
+    total = por_thread * threads
+    melhores = list(range(total - 1, total - 11, -1))
+    assert armazem.total("Normal") == total
+    assert [linha[1] for linha in armazem.top("Normal", 10)] == melhores
+    armazem.fechar()
+
+    with sqlite3.connect(str(tmp_path / "recordes.db")) as conexao:
+        pontos = [p for (p,) in conexao.execute("SELECT pontos FROM recordes WHERE chave = 'Normal'")]
+    assert sorted(pontos) == list(range(total))
+
+    armazem = abrir(tmp_path)
+    assert armazem.total("Normal") == total
+    assert [linha[1] for linha in armazem.top("Normal", 10)] == melhores
+    assert [armazem.posicao("Normal", p) for p in melhores] == list(range(2, 12))
+    assert armazem.posicao("Normal", total) == 1
+    assert armazem.posicao("Normal", -1) == total + 1
+    armazem.fechar()
+
+
+def test_empates_ficam_atras_de_quem_chegou_antes(tmp_path):
+    armazem = abrir(tmp_path)
+    salvar_todos(armazem, "Pro", [("A", 100), ("B", 100), ("C", 50)])
+    assert [linha[0] for linha in armazem.top("Pro")] == ["A", "B", "C"]
+    # Com o cache já carregado, a entrada nova passa pelo caminho de inserção do salvar.
+    salvar_todos(armazem, "Pro", [("D", 200), ("E", 100)])
+    esperado = ["D", "A", "B", "E", "C"]
+    assert [linha[0] for linha in armazem.top("Pro")] == esperado
+    assert armazem.posicao("Pro", 100) == 5
+    assert armazem.posicao("Pro", 101) == 2
+    armazem.fechar()
+
+    armazem = abrir(tmp_path)
+    assert [linha[0] for linha in armazem.top("Pro")] == esperado
+    assert armazem.posicao("Pro", 100) == 5
+    assert armazem.total("Pro") == 5
+    assert armazem.total("Normal") == 0
+    armazem.fechar()
+
+
+def test_top_devolve_copia_e_respeita_n(tmp_path):
+    armazem = abrir(tmp_path)
+    salvar_todos(armazem, "Normal", [(f"J{i}", i) for i in range(30)])
+    top = armazem.top("Normal", 3)
+    assert [linha[1] for linha in top] == [29, 28, 27]
+    top[0][1] = -1
+    top.clear()
+    assert [linha[1] for linha in armazem.top("Normal", 3)] == [29, 28, 27]
+    # Acima do tamanho do cache a consulta vai ao banco e junta com o que ainda está na fila.
+    assert [linha[1] for linha in armazem.top("Normal", 20)] == list(range(29, 9, -1))
+    armazem.fila.join()
+    salvar_todos(armazem, "Normal", [("Novo", 15)])
+    top = armazem.top("Normal", 20)
+    assert [linha[1] for linha in top] == list(range(29, 15, -1)) + [15, 15, 14, 13, 12, 11]
+    assert [linha[0] for linha in top[14:16]] == ["J15", "Novo"]
+    armazem.fechar()
+
+
+def test_migra_placar_json(tmp_path):
+    legado = tmp_path / "recordes.json"
+    legado.write_text(json.dumps({"Normal": [["A", 10, 2.5], ["B", 30, 1.0]]}))
+    armazem = abrir(tmp_path, arquivo_legado=str(legado))
+    assert armazem.top("Normal") == [["B", 30, 1.0], ["A", 10, 2.5]]
+    armazem.fechar()
+    assert not legado.exists()
+    assert (tmp_path / "recordes.json.migrado").exists()
+
+    # Reabrir não importa de novo.
+    armazem = abrir(tmp_path, arquivo_legado=str(legado))
+    assert armazem.total("Normal") == 2
+    armazem.fechar()
+
+
+def test_lote_grava_com_varias_voltas_da_fila(tmp_path, monkeypatch):
+    monkeypatch.setattr(recordes, "LOTE_ESCRITA", 3)
+    armazem = abrir(tmp_path)
+    salvar_todos(armazem, "Mega", [(f"J{i}", i) for i in range(10)])
+    armazem.fechar()
+    armazem = abrir(tmp_path)
+    assert armazem.total("Mega") == 10
+    assert armazem.pendentes == []
+    armazem.fechar()
@@ -0,0 +1,115 @@
+import pytest
+
+import replay
+from nucleo_grafo import ESTADO_INPUT_NOME, ESTADO_JOGANDO, INFINITO, VISITADO
+from replay import CacheFases, NucleoReplay, Replay, verificar
+
+
+@pytest.fixture(autouse=True)
+def sem_banco(tmp_path, monkeypatch):
+    # verificar abre o banco de fases da pasta atual; os testes geram tudo na hora.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(replay, "_fases", None)
+
+
+def clicar_no(jogo, id):
+    jogo.agora += 650
+    jogo.clicar((jogo.grafo.xs[id], jogo.grafo.ys[id]))
+
+
+# Joga pela fronteira errando duas vezes no caminho; no modo infinito para de acertar depois de
+# `jogadas` acertos e perde a energia errando.
+def jogar(modo, dificuldade, semente, jogadas=None):
+    jogo = NucleoReplay(CacheFases())
+    jogo.modo = modo
+    jogo.iniciar_nivel(dificuldade, semente)
+    acertos, errou = 0, set()
+    while jogo.estado == ESTADO_JOGANDO:
+        grafo = jogo.grafo
+        errado = next((v for v in range(len(grafo))
+                       if not grafo.tem_flag(v, VISITADO) and not jogo.fronteira.aceita(v)), None)
+        if errado is not None and (acertos == jogadas or (acertos in (3, 8) and acertos not in errou)):
+            errou.add(acertos)
+            clicar_no(jogo, errado)
+        else:
+            u = jogo.fronteira.expandindo()
+            clicar_no(jogo, next(v for v in grafo.vizinhos(u) if not grafo.tem_flag(v, VISITADO)))
+            acertos += 1
+    assert jogo.estado == ESTADO_INPUT_NOME
+    return Replay.de_partida(jogo)
+
+
+@pytest.mark.parametrize("modo, dificuldade, semente, jogadas", [
+    ("BFS", "Normal", 3, None),
+    ("DFS", "Pro", 11, None),
+    ("DFS", "Hacker", 2024, None),
+    ("BFS", INFINITO, 7, 25),
+])
+def test_replay_refaz_a_pontuacao(modo, dificuldade, semente, jogadas):
+    gravado = jogar(modo, dificuldade, semente, jogadas)
+    dados = gravado.para_bytes()
+    lido = Replay.de_bytes(dados)
+    assert (lido.modo, lido.dificuldade, lido.gerador, lido.semente) == (modo, dificuldade, gravado.gerador, semente)
+    assert list(lido.cliques_ms) == list(gravado.cliques_ms)
+
+    resultado = verificar(dados)
+    assert resultado["valido"], resultado["motivo"]
+    assert resultado["pontos"] == gravado.pontos
+    assert round(resultado["tempo"] * 1000) == gravado.tempo_ms
+
+
+def test_pontuacao_forjada_e_recusada():
+    gravado = jogar("BFS", "Normal", 3)
+    for campo, delta in (("pontos", 1000), ("tempo_ms", -650)):
+        forjado = Replay.de_bytes(gravado.para_bytes())
+        setattr(forjado, campo, getattr(forjado, campo) + delta)
+        resultado = verificar(forjado.para_bytes())
+        assert not resultado["valido"]
+        assert resultado["motivo"].startswith("declarado")
+
+
+def test_replay_adulterado_e_recusado():
+    gravado = jogar("DFS", "Normal", 5)
+    dados = gravado.para_bytes()
+    assert verificar(dados[:-4])["motivo"] == "replay corrompido"
+    assert not verificar(b"GRAFOBNK" + dados[8:])["valido"]
+
+    # Um clique a menos: a partida não termina.
+    gravado.cliques_ms.pop()
+    gravado.cliques_xy.pop()
+    gravado.cliques_xy.pop()
+    assert verificar(gravado.para_bytes())["motivo"] == "partida não terminou"
+
+
+@pytest.mark.parametrize("coordenada", [float("nan"), float("inf"), float("-inf")])
+def test_coordenada_nao_finita_e_recusada(coordenada):
+    gravado = jogar("BFS", "Normal", 3)
+    gravado.cliques_xy[4] = coordenada
+    dados = gravado.para_bytes()
+    with pytest.raises(ValueError):
+        Replay.de_bytes(dados)
+    assert verificar(dados)["motivo"] == "clique com coordenada inválida"
+
+
+def test_falha_num_replay_nao_derruba_o_lote(monkeypatch):
+    bom = jogar("DFS", "Pro", 11).para_bytes()
+    ruim = jogar("BFS", "Normal", 3).para_bytes()
+    verificar_original = replay.verificar
+
+    def verificar_quebrando(dados):
+        if dados == ruim:
+            raise RuntimeError("quebrou")
+        return verificar_original(dados)
+
+    monkeypatch.setattr(replay, "verificar", verificar_quebrando)
+    resultados = replay.verificar_varios([bom, ruim, bom])
+    assert [r["valido"] for r in resultados] == [True, False, True]
+    assert "quebrou" in resultados[1]["motivo"]
+
+
+def test_lote_com_replay_estragado():
+    bom = jogar("BFS", "Normal", 3)
+    ruim = Replay.de_bytes(bom.para_bytes())
+    ruim.cliques_xy[0] = float("nan")
+    resultados = replay.verificar_lote([bom.para_bytes(), ruim.para_bytes()], processos=1)
+    assert [r["valido"] for r in resultados] == [True, False]
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import servidor_placar
+from servidor_placar import ServidorPlacar
+
+
+# Sobe um placar numa porta livre, manda as linhas por uma conexão e devolve as respostas
+# (uma por linha, na ordem) e as linhas gravadas no SQLite depois de fechar.
+def conversar(caminho, linhas, antes_de_fechar=None):
+    async def sessao():
+        placar = ServidorPlacar(str(caminho), processos=1)
+        servidor = await placar.iniciar("127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        try:
+            leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+            respostas = []
+            for linha in linhas:
+                escritor.write(linha.encode() + b"\n")
+                await escritor.drain()
+                respostas.append(json.loads(await leitor.readline()))
+            escritor.close()
+            if antes_de_fechar:
+                await antes_de_fechar(placar)
+        finally:
+            await placar.fechar()
+        return respostas
+
+    respostas = asyncio.run(sessao())
+    with sqlite3.connect(caminho) as conexao:
+        gravadas = conexao.execute("SELECT chave, nome, pontos, tempo FROM recordes ORDER BY id").fetchall()
+    return respostas, gravadas
+
+
+def salvar(id, pontos, tempo, nome="ana"):
+    return f'{{"id": {id}, "op": "salvar", "chave": "BFS_Normal", "nome": "{nome}", "pontos": {pontos}, "tempo": {tempo}}}'
+
+
+@pytest.mark.parametrize("linha", [
+    "isto não é json",
+    '{"id": 1, "op": "salvar", "chave": "BFS_Normal", "nome": "ana"}',
+    salvar(1, "Infinity", 10.0),
+    salvar(1, "-Infinity", 10.0),
+    salvar(1, "NaN", 10.0),
+    salvar(1, 10**23, 10.0),
+    salvar(1, -(10**23), 10.0),
+    salvar(1, 12.5, 10.0),
+    salvar(1, '"4321"', 10.0),
+    salvar(1, "true", 10.0),
+    salvar(1, 4321, "Infinity"),
+    salvar(1, 4321, "NaN"),
+    salvar(1, 4321, -1),
+    salvar(1, 4321, 1e400),
+    '{"id": 1, "op": "top", "chave": "BFS_Normal", "n": Infinity}',
+    '{"id": 1, "op": "top", "chave": "BFS_Normal", "n": NaN}',
+    "[1, 2]",
+])
+def test_envio_invalido_recebe_erro_e_a_conexao_continua(tmp_path, linha):
+    respostas, gravadas = conversar(tmp_path / "placar.db", [
+        linha,
+        salvar(2, 4321, 12.5),
+        '{"id": 3, "op": "top", "chave": "BFS_Normal", "n": 5}',
+    ])
+    assert "erro" in respostas[0]
+    assert respostas[1] == {"id": 2, "chave": "BFS_Normal", "posicao": 1}
+    assert respostas[2]["top"] == [["ana", 4321, 12.5]] and respostas[2]["total"] == 1
+    assert gravadas == [("BFS_Normal", "ana", 4321, 12.5)]
+
+
+def test_limites_de_64_bits_sao_aceitos(tmp_path):
+    maior, menor = servidor_placar.PONTOS_MAX, servidor_placar.PONTOS_MIN
+    respostas, gravadas = conversar(tmp_path / "placar.db", [salvar(1, maior, 1.0), salvar(2, menor, 2.0)])
+    assert [r["posicao"] for r in respostas] == [1, 2]
+    assert [linha[2] for linha in gravadas] == [maior, menor]
+
+
+def test_lote_que_falha_nao_para_a_escrita(tmp_path):
+    caminho = tmp_path / "placar.db"
+
+    def contar():
+        with sqlite3.connect(caminho) as conexao:
+            return conexao.execute("SELECT COUNT(*) FROM recordes").fetchone()[0]
+
+    async def sessao():
+        placar = ServidorPlacar(str(caminho), processos=1)
+        await placar.iniciar("127.0.0.1", 0)
+        gravar, tentativas = placar.gravar, []
+
+        def gravar_falhando_uma_vez(lote):
+            tentativas.append(lote)
+            if len(tentativas) == 1:
+                raise RuntimeError("disco indisponível")
+            gravar(lote)
+
+        placar.gravar = gravar_falhando_uma_vez
+        try:
+            placar.responder(salvar(1, 100, 1.0, "perdido"))
+            while not tentativas:
+                await asyncio.sleep(0.01)
+            # Ainda antes do fechar: o laço de escrita sobreviveu e grava o lote seguinte.
+            placar.responder(salvar(2, 200, 2.0))
+            for _ in range(200):
+                if contar():
+                    break
+                await asyncio.sleep(0.01)
+            return contar()
+        finally:
+            await placar.fechar()
+
+    with pytest.warns(UserWarning, match="disco indisponível"):
+        assert asyncio.run(sessao()) == 1